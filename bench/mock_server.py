@@ -0,0 +1,193 @@
+"""本地模拟服务：代替 twitterapi.io 的 advanced_search 和 RSS 源，可注入延迟和错误
+
+路由：
+    /ps/<每页条数>/twitter/tweet/advanced_search?query=...&cursor=...
+    /tl/<每页条数>/<页数>/twitter/tweet/advanced_search?query=...&cursor=...
+    /tl/post?n=<条数>
+    /rss/<源编号>.xml?n=<条数>
+
+/ps 每次请求都返回全新的推文，翻页数固定为 --pages。/tl 模拟真实的时间线：每个查询（忽略
+since_id）有固定的推文序列，按 since_id 过滤，可翻的页数可以超过抓取端的 max_pages；
+/tl/post 让所有时间线各发出 n 条新推文，用于测试截断后的增量抓取。
+查询中的 from:<用户名> 会轮流作为推文作者，合并查询的按作者分回逻辑因此可以被覆盖到。
+"""
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+import synthetic
+
+SEARCH_RE = re.compile(r"^/ps/(\d+)/twitter/tweet/advanced_search$")
+TIMELINE_RE = re.compile(r"^/tl/(\d+)/(\d+)/twitter/tweet/advanced_search$")
+SINCE_RE = re.compile(r"\s*since_id:(\d+)")
+RSS_RE = re.compile(r"^/rss/(\d+)\.xml$")
+FROM_RE = re.compile(r"from:(\w+)")
+# 时间线推文 id = 序号 × TIMELINE_SLOTS + 查询编号，不同查询的 id 不重复且都按时间递增
+TIMELINE_SLOTS = 1000
+
+
+class MockState:
+    """服务端共享状态：注入参数、推文 id 计数和请求统计"""
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, pages: int = 3, seed: int = 0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.pages = pages
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.next_id = 1_950_000_000_000_000_000
+        self.requests = 0
+        self.errors = 0
+        self.feeds = {}
+        self.head = 1_000_000
+        self.slots = {}
+
+    def inject(self) -> bool:
+        """按配置等待，返回本次是否应返回错误"""
+        with self.lock:
+            self.requests += 1
+            delay = self.latency * (0.5 + self.rng.random()) if self.latency else 0
+            fail = self.rng.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def timeline(self, query: str) -> tuple:
+        """时间线查询的 (当前最新序号, 查询编号)"""
+        with self.lock:
+            slot = self.slots.setdefault(query, len(self.slots) + 1)
+            return self.head, slot
+
+    def post(self, count: int):
+        with self.lock:
+            self.head += count
+
+    def take_ids(self, count: int) -> int:
+        """分配一段递增的 id，返回这段中最大的 id（推文按 id 递减返回）"""
+        with self.lock:
+            self.next_id += count
+            return self.next_id
+
+
+class Handler(BaseHTTPRequestHandler):
+    state = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_body(self, status: int, body: bytes, content_type: str, headers: dict = None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        # 控制接口不计入请求数，也不注入错误
+        if url.path == "/tl/post":
+            self.state.post(int(params.get("n", 1)))
+            self.send_body(200, b"{}", "application/json")
+            return
+        if self.state.inject():
+            self.send_body(503, b'{"error": "injected"}', "application/json", {"Retry-After": "0"})
+            return
+
+        m = SEARCH_RE.match(url.path)
+        if m:
+            page = int(params.get("cursor", 0))
+            size = int(m.group(1))
+            tweets = synthetic.raw_tweets(size, self.state.take_ids(size), FROM_RE.findall(params.get("query", "")))
+            has_next = page + 1 < self.state.pages
+            body = {"tweets": tweets, "has_next_page": has_next, "next_cursor": str(page + 1) if has_next else ""}
+            self.send_body(200, json.dumps(body).encode("utf-8"), "application/json")
+            return
+
+        m = TIMELINE_RE.match(url.path)
+        if m:
+            self.send_timeline(int(m.group(1)), int(m.group(2)), params)
+            return
+
+        m = RSS_RE.match(url.path)
+        if m:
+            key = (int(m.group(1)), int(params.get("n", 10)))
+            with self.state.lock:
+                if key not in self.state.feeds:
+                    self.state.feeds[key] = synthetic.rss_xml(key[1], key[0]).encode("utf-8")
+                body = self.state.feeds[key]
+            self.send_body(200, body, "application/rss+xml")
+            return
+
+        self.send_body(404, b"not found", "text/plain")
+
+    def send_timeline(self, size: int, pages: int, params: dict):
+        """时间线的一页：最多 pages 页，遇到 since_id 即结束"""
+        query = params.get("query", "")
+        since = SINCE_RE.search(query)
+        since = int(since.group(1)) if since else 0
+        head, slot = self.state.timeline(SINCE_RE.sub("", query).strip())
+        page = int(params.get("cursor", 0))
+        start = head - page * size
+        tweets = [
+            t for t in synthetic.raw_tweets(size, start * TIMELINE_SLOTS + slot, FROM_RE.findall(query), TIMELINE_SLOTS)
+            if int(t["id"]) > since
+        ]
+        has_next = page + 1 < pages and len(tweets) == size
+        body = {"tweets": tweets, "has_next_page": has_next, "next_cursor": str(page + 1) if has_next else ""}
+        self.send_body(200, json.dumps(body).encode("utf-8"), "application/json")
+
+
+class MockServer:
+    """在后台线程中运行的模拟服务"""
+
+    def __init__(self, port: int = 0, **options):
+        self.state = MockState(**options)
+        handler = type("BoundHandler", (Handler,), {"state": self.state})
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="twitterapi.io / RSS 模拟服务")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="平均响应延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回 503 的比例")
+    parser.add_argument("--pages", type=int, default=3, help="每个查询可翻的页数")
+    args = parser.parse_args()
+
+    server = MockServer(args.port, latency=args.latency, error_rate=args.error_rate, pages=args.pages)
+    print(f"Mock server listening on {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""离线基准测试：用模拟服务、合成数据和模拟 openclaw 测量各阶段在不同规模下的耗时
+
+    python bench/run.py                          # 默认规模 10 和 1000
+    python bench/run.py --sizes 10,1000,100000 --output bench/results.json
+    python bench/run.py --baseline bench/results.json   # 比基线慢超过容差时以非零状态退出
+    python bench/run.py --sizes 2000,20000 --stages dedupe   # 耗时超线性增长时以非零状态退出
+    python bench/run.py --stages fetch_x_deep   # 分页被截断时的增量抓取，高水位失效时以非零状态退出
+
+每个 (阶段, 规模) 在独立子进程和临时数据目录中运行，互不影响，也不触碰 data/ 和 docs/。
+"""
+import argparse
+import json
+import math
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+SRC_DIR = BENCH_DIR.parent / "src"
+sys.path.insert(0, str(BENCH_DIR))
+sys.path.insert(0, str(SRC_DIR))
+
+STAGES = ("fetch_x", "fetch_x_deep", "fetch_rss", "dedupe", "analyze", "generate")
+# fetch_x_deep 中每个查询可翻的页数比 max_pages 多出的页数
+DEEP_EXTRA_PAGES = 5
+RESULT_PREFIX = "BENCH_RESULT "
+
+
+def fetch_x_page_size(size: int) -> int:
+    """按一次抓取会发出的请求数分配每页条数，使抓取总量约等于 size"""
+    from config import SCHEDULER_CONFIG, X_API_CONFIG
+    import fetch_x
+    from query_planner import plan_account_queries
+    groups = plan_account_queries(fetch_x.load_accounts(), fetch_x.ACCOUNT_KEYWORDS, {})
+    requests = min(len(groups), SCHEDULER_CONFIG["max_queries"]) * X_API_CONFIG["max_pages"] + 3
+    return math.ceil(size / requests)
+
+
+def bench_fetch_x(size: int, mock_url: str) -> int:
+    from config import X_API_CONFIG
+    X_API_CONFIG["rate_limit"] = 0
+    import fetch_x
+    X_API_CONFIG["api_base"] = f"{mock_url}/ps/{fetch_x_page_size(size)}"
+    return len(fetch_x.collect_tweets())
+
+
+def bench_fetch_x_deep(size: int, mock_url: str) -> tuple:
+    """每个查询的新推文都多于 max_pages 页：首次抓取被截断，之后只应抓取新发的推文
+
+    计时的是第二次抓取；高水位没有建立或没有生效时以非零状态退出。
+    """
+    from config import X_API_CONFIG
+    X_API_CONFIG["rate_limit"] = 0
+    X_API_CONFIG["request_budget"] = 10 ** 6
+    import fetch_x
+    import http_client
+    from fetch_state import load_state
+    per_page = fetch_x_page_size(size)
+    X_API_CONFIG["api_base"] = f"{mock_url}/tl/{per_page}/{X_API_CONFIG['max_pages'] + DEEP_EXTRA_PAGES}"
+
+    first = fetch_x.collect_tweets()
+    missing = [key for key, mark in load_state().items() if not mark.get("since_id")]
+    if missing:
+        raise RuntimeError(f"no high-water mark after a truncated first fetch: {', '.join(missing)}")
+    # 每条时间线发出一页新推文
+    http_client.get_session().get(f"{mock_url}/tl/post", params={"n": per_page}, timeout=10).raise_for_status()
+    start = time.perf_counter()
+    second = fetch_x.collect_tweets()
+    seconds = time.perf_counter() - start
+    if len(second) >= len(first):
+        raise RuntimeError(f"second fetch was not incremental: {len(second)} tweets after {len(first)}")
+    return len(second), seconds
+
+
+def bench_fetch_rss(size: int, mock_url: str) -> int:
+    from config import RSS_CONFIG, RSS_FEEDS
+    RSS_FEEDS[:] = [f"{mock_url}/rss/{i}.xml?n={math.ceil(size / 4)}" for i in range(4)]
+    RSS_CONFIG["max_entries"] = size
+    import fetch_rss
+    return len(fetch_rss.collect_articles())
+
+
+def bench_dedupe(size: int, mock_url: str) -> tuple:
+    import synthetic
+    from dedupe import cluster_items
+    items = synthetic.items(size)
+    start = time.perf_counter()
+    cluster_items(items)
+    return size, time.perf_counter() - start
+
+
+def bench_analyze(size: int, mock_url: str) -> tuple:
+    from config import ANALYZE_CONFIG
+    ANALYZE_CONFIG["deadline"] = 24 * 3600
+    import analyze
+    import synthetic
+    items = synthetic.items(size)
+    start = time.perf_counter()
+    result = analyze.analyze_items(items)
+    return len(result), time.perf_counter() - start
+
+
+def bench_generate(size: int, mock_url: str) -> tuple:
+    import generate
+    import synthetic
+    from classifier import classify
+    from dedupe import item_text
+    from item_store import ItemStore
+    items = synthetic.items(size)
+    for item in items:
+        item["priority"], item["category"] = classify(item_text(item))
+    store = ItemStore()
+    store.add_items(items)
+    store.close()
+    start = time.perf_counter()
+    generate.generate_simple_report()
+    return size, time.perf_counter() - start
+
+
+def run_worker(stage: str, size: int, mock_url: str):
+    """子进程：运行单个阶段并在最后一行输出结果"""
+    bench = globals()[f"bench_{stage}"]
+    start = time.perf_counter()
+    result = bench(size, mock_url)
+    # 需要先准备数据的阶段自行返回 (条数, 耗时)，只统计被测部分
+    items, seconds = result if isinstance(result, tuple) else (result, time.perf_counter() - start)
+    import metrics
+    print(RESULT_PREFIX + json.dumps({
+        "stage": stage,
+        "size": size,
+        "items": items,
+        "seconds": round(seconds, 4),
+        "items_per_second": round(items / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages": metrics.snapshot()["stages"],
+    }))
+
+
+def run_case(stage: str, size: int, mock_url: str, args) -> dict:
+    tmp = tempfile.mkdtemp(prefix=f"bench-{stage}-{size}-")
+    env = {
+        **os.environ,
+        "DATA_DIR": os.path.join(tmp, "data"),
+        "OUTPUT_DIR": os.path.join(tmp, "docs"),
+        "PATH": f"{BENCH_DIR / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}",
+        "FAKE_OPENCLAW_LATENCY": str(args.llm_latency),
+        "FAKE_OPENCLAW_ERROR_RATE": str(args.llm_error_rate),
+    }
+    try:
+        proc = subprocess.run(
+            [sys.executable, __file__, "--worker", stage, "--size", str(size), "--mock-url", mock_url],
+            env=env, capture_output=True, text=True,
+        )
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if args.verbose or proc.returncode != 0:
+        sys.stdout.write(proc.stdout)
+        sys.stderr.write(proc.stderr)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"{stage} at size {size} failed (exit {proc.returncode})")
+
+
+def compare(results: list, baseline_path: str, tolerance: float) -> list:
+    """与基线比较，返回变慢超过容差的条目描述"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["stage"], r["size"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        base = baseline.get((r["stage"], r["size"]))
+        # 很短的用例噪声大，绝对差值低于 50ms 不算回归
+        if base and r["seconds"] > base["seconds"] * (1 + tolerance) and r["seconds"] - base["seconds"] > 0.05:
+            regressions.append(f"{r['stage']}@{r['size']}: {base['seconds']:.3f}s -> {r['seconds']:.3f}s")
+    return regressions
+
+
+def check_scaling(results: list, factor: float) -> list:
+    """同一阶段规模扩大 k 倍时耗时增长超过 k × factor 视为超线性，返回问题描述
+
+    较小规模耗时不足 0.1 秒时固定开销占主导，不参与比较。
+    """
+    by_stage = {}
+    for r in results:
+        by_stage.setdefault(r["stage"], []).append(r)
+    problems = []
+    for stage, runs in by_stage.items():
+        runs.sort(key=lambda r: r["size"])
+        for small, large in zip(runs, runs[1:]):
+            if small["seconds"] < 0.1:
+                continue
+            growth = large["seconds"] / small["seconds"]
+            allowed = large["size"] / small["size"] * factor
+            if growth > allowed:
+                problems.append(f"{stage}: {small['size']} -> {large['size']} items took {growth:.1f}x longer "
+                                f"(allowed {allowed:.1f}x)")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="离线基准测试")
+    parser.add_argument("--sizes", default="10,1000", help="逗号分隔的条目规模，如 10,1000,100000")
+    parser.add_argument("--stages", default=",".join(STAGES), help="逗号分隔的阶段")
+    parser.add_argument("--latency", type=float, default=0.0, help="模拟服务的平均响应延迟（秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="模拟服务返回 503 的比例")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="模拟 openclaw 每次调用的延迟（秒）")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0, help="模拟 openclaw 调用失败的比例")
+    parser.add_argument("--output", help="把结果写到 JSON 文件，可作为之后的基线")
+    parser.add_argument("--baseline", help="基线结果文件")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="允许比基线慢的比例")
+    parser.add_argument("--scaling-factor", type=float, default=1.5,
+                        help="耗时增长超过规模增长的倍数时判为超线性并以非零状态退出")
+    parser.add_argument("--verbose", action="store_true", help="显示各阶段自身的输出")
+    parser.add_argument("--worker", choices=STAGES, help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--mock-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.size, args.mock_url)
+        return
+
+    from mock_server import MockServer
+    server = MockServer(latency=args.latency, error_rate=args.error_rate).start()
+    results = []
+    try:
+        print(f"{'stage':<12} {'size':>8} {'items':>8} {'seconds':>9} {'items/s':>10} {'rss MB':>8}")
+        for size in (int(s) for s in args.sizes.split(",")):
+            for stage in args.stages.split(","):
+                r = run_case(stage, size, server.url, args)
+                results.append(r)
+                print(f"{r['stage']:<12} {r['size']:>8} {r['items']:>8} {r['seconds']:>9.3f} "
+                      f"{r['items_per_second'] or 0:>10.1f} {r['peak_rss_mb']:>8.1f}")
+    finally:
+        server.stop()
+    print(f"Mock server: {server.state.requests} requests, {server.state.errors} injected errors")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "results": results}, f, indent=2)
+    failed = False
+    for line in check_scaling(results, args.scaling_factor):
+        print(f"SCALING {line}")
+        failed = True
+    if args.baseline:
+        for line in compare(results, args.baseline, args.tolerance):
+            print(f"REGRESSION {line}")
+            failed = True
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
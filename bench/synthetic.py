@@ -0,0 +1,105 @@
+"""由录制的样本生成任意规模的合成数据：API 原始推文、RSS XML、流程内条目"""
+import copy
+import json
+import os
+import random
+from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# 追加到样本文本末尾的随机词，使合成条目既有近似重复也有足够多的独立事件
+VOCABULARY = (
+    "exchange custody stablecoin token issuer wallet court filing agency guidance licence "
+    "bank broker dealer settlement penalty disclosure reserve audit market investor retail "
+    "derivatives futures staking lending mixer sanctions compliance framework consultation "
+    "bitcoin ether solana tron ripple polygon avalanche arbitrum optimism base cosmos "
+    "hearing testimony senate house committee bill draft rule waiver exemption charter "
+    "hack exploit bridge oracle validator governance treasury airdrop listing delisting"
+).split()
+
+with open(os.path.join(FIXTURE_DIR, "advanced_search.json"), "r", encoding="utf-8") as f:
+    SEARCH_PAGE = json.load(f)
+with open(os.path.join(FIXTURE_DIR, "feed.xml"), "r", encoding="utf-8") as f:
+    FEED_XML = f.read()
+
+ITEMS_START = FEED_XML.index("    <item>")
+ITEMS_END = FEED_XML.rindex("</item>") + len("</item>\n")
+FEED_HEAD, FEED_TAIL = FEED_XML[:ITEMS_START], FEED_XML[ITEMS_END:]
+ARTICLES = [
+    (block.split("<title>")[1].split("</title>")[0],
+     block.split("<![CDATA[")[1].split("]]>")[0])
+    for block in FEED_XML[ITEMS_START:ITEMS_END].split("</item>")[:-1]
+]
+
+
+def noise(seed: int, words: int = 10) -> str:
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(words))
+
+
+def created_at(seq: int) -> str:
+    t = datetime.now(timezone.utc) - timedelta(minutes=seq % (3 * 24 * 60))
+    return t.strftime("%a %b %d %H:%M:%S +0000 %Y")
+
+
+def raw_tweets(count: int, start_id: int, authors: list = None, step: int = 1) -> list:
+    """advanced_search 返回的推文；给定 authors 时轮流作为作者，id 从 start_id 按 step 递减"""
+    template = SEARCH_PAGE["tweets"]
+    tweets = []
+    for i in range(count):
+        t = copy.deepcopy(template[i % len(template)])
+        tid = start_id - i * step
+        t["id"] = str(tid)
+        t["text"] = f"{t['text']} {noise(tid)}"
+        t["createdAt"] = created_at(i)
+        if authors:
+            t["author"]["userName"] = authors[i % len(authors)]
+        t["url"] = f"https://x.com/{t['author']['userName']}/status/{tid}"
+        tweets.append(t)
+    return tweets
+
+
+def rss_xml(count: int, feed: int = 0) -> str:
+    """含 count 条文章的 RSS 文本"""
+    items = []
+    for i in range(count):
+        title, description = ARTICLES[i % len(ARTICLES)]
+        pub = (datetime.now(timezone.utc) - timedelta(minutes=i)).strftime("%a, %d %b %Y %H:%M:%S +0000")
+        items.append(
+            f"    <item>\n"
+            f"      <title>{escape(title)} {noise(feed * 1_000_000 + i, 3)}</title>\n"
+            f"      <link>https://news.example.com/{feed}/article-{i}</link>\n"
+            f"      <pubDate>{pub}</pubDate>\n"
+            f"      <description><![CDATA[{description}]]></description>\n"
+            f"    </item>\n"
+        )
+    return FEED_HEAD + "".join(items) + FEED_TAIL
+
+
+def items(count: int) -> list:
+    """流程内的条目（fetch_x / fetch_rss 的输出格式），推文和文章约 3:1"""
+    result = []
+    tweets = raw_tweets(count - count // 4, 1_900_000_000_000_000_000)
+    for t in tweets:
+        result.append({
+            "id": t["id"],
+            "text": t["text"],
+            "created_at": t["createdAt"],
+            "author": t["author"]["userName"],
+            "url": t["url"],
+            "source": "x",
+            "query": f"from:{t['author']['userName']}",
+            "account_category": "",
+        })
+    for i in range(count // 4):
+        title, description = ARTICLES[i % len(ARTICLES)]
+        result.append({
+            "title": f"{title} {noise(i, 3)}",
+            "summary": description[:300],
+            "link": f"https://news.example.com/bench/article-{i}",
+            "published": (datetime.now(timezone.utc) - timedelta(minutes=i)).strftime("%a, %d %b %Y %H:%M:%S +0000"),
+            "source": "rss",
+            "feed_url": "https://news.example.com/rss",
+        })
+    return result
@@ -0,0 +1,119 @@
+"""监控账号注册表 - 只加载一次 config/accounts.json，文件修改后自动重新加载"""
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import BASE_DIR
+
+ACCOUNTS_FILE = os.path.join(BASE_DIR, "config", "accounts.json")
+PRIORITIES = ("high", "medium", "low")
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def validate_account(raw: dict) -> dict:
+    """校验并规范化单个账号，无效时返回 None"""
+    username = str(raw.get("username", "")).strip().lstrip("@")
+    if not username:
+        print(f"Skipping account without username: {raw}")
+        return None
+    priority = raw.get("priority", "medium")
+    if priority not in PRIORITIES:
+        print(f"Unknown priority '{priority}' for @{username}, using medium")
+        priority = "medium"
+    return {
+        **raw,
+        "username": username,
+        "category": raw.get("category", ""),
+        "priority": priority,
+        "enabled": bool(raw.get("enabled", True)),
+    }
+
+
+class AccountRegistry:
+    """按用户名（不区分大小写）、分类、优先级索引的账号表"""
+
+    def __init__(self, path: str = ACCOUNTS_FILE):
+        self.path = path
+        self.mtime = None
+        self.lock = threading.Lock()
+        self.accounts = []
+        self.by_username = {}
+        self.by_category_index = {}
+        self.by_priority_index = {}
+
+    def refresh(self):
+        """文件 mtime 变化时重新加载并重建索引"""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            mtime = None
+        if mtime == self.mtime:
+            return
+        with self.lock:
+            if mtime == self.mtime:
+                return
+            accounts = []
+            if mtime is not None:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    config = json.load(f)
+                accounts = [a for a in map(validate_account, config.get("accounts", [])) if a]
+
+            by_username, by_category, by_priority = {}, {}, {}
+            for account in accounts:
+                key = account["username"].lower()
+                if key in by_username:
+                    print(f"Duplicate account @{account['username']}, keeping the first entry")
+                    continue
+                by_username[key] = account
+                by_category.setdefault(account["category"], []).append(account)
+                by_priority.setdefault(account["priority"], []).append(account)
+
+            self.accounts = list(by_username.values())
+            self.by_username = by_username
+            self.by_category_index = by_category
+            self.by_priority_index = by_priority
+            self.mtime = mtime
+
+    def all(self) -> list:
+        """全部账号（含未启用）"""
+        self.refresh()
+        return self.accounts
+
+    def enabled(self) -> list:
+        """已启用的账号"""
+        return [a for a in self.all() if a["enabled"]]
+
+    def get(self, username: str) -> dict:
+        """按用户名查找，不区分大小写，找不到返回 None"""
+        self.refresh()
+        return self.by_username.get(username.lstrip("@").lower())
+
+    def category_of(self, username: str) -> str:
+        """账号分类，未登记的账号返回空字符串"""
+        account = self.get(username)
+        return account["category"] if account else ""
+
+    def by_category(self, category: str) -> list:
+        self.refresh()
+        return self.by_category_index.get(category, [])
+
+    def by_priority(self, priority: str) -> list:
+        self.refresh()
+        return self.by_priority_index.get(priority, [])
+
+    def __contains__(self, username: str) -> bool:
+        return self.get(username) is not None
+
+
+def get_registry() -> AccountRegistry:
+    """进程内共享的账号注册表"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = AccountRegistry()
+        return _registry
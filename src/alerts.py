@@ -0,0 +1,106 @@
+"""告警推送 - 把 P1 条目发送到可插拔的输出端（stdout / 文件 / webhook / 测试用桩）"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import http_client
+import metrics
+from config import MONITOR_CONFIG
+from ndjson_io import write_records
+
+
+def alert_payload(item: dict) -> dict:
+    """告警内容：只保留推送需要的字段"""
+    return {
+        "priority": item.get("priority"),
+        "category": item.get("category", ""),
+        "title": item.get("title") or item.get("text", "")[:120],
+        "summary": item.get("summary", ""),
+        "source": item.get("source", ""),
+        "url": item.get("url") or item.get("link", ""),
+        "author": item.get("author", ""),
+        "published": item.get("created_at") or item.get("published", ""),
+    }
+
+
+class StdoutSink:
+    """打印到标准输出"""
+
+    name = "stdout"
+
+    def send(self, alerts: list):
+        for alert in alerts:
+            print(f"[ALERT {alert['priority']}] {alert['title']} {alert['url']}")
+
+
+class FileSink:
+    """追加写入 NDJSON 文件，便于其他进程 tail"""
+
+    name = "file"
+
+    def __init__(self, path: str = MONITOR_CONFIG["alert_file"]):
+        self.path = path
+
+    def send(self, alerts: list):
+        write_records(self.path, alerts, append=True)
+
+
+class WebhookSink:
+    """以 JSON POST 到 webhook（Slack/企业微信等可在接收端转换格式）"""
+
+    name = "webhook"
+
+    def __init__(self, url: str, timeout: float = 10):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alerts: list):
+        resp = http_client.get_session().post(self.url, json={"alerts": alerts}, timeout=self.timeout)
+        resp.raise_for_status()
+
+
+class StubSink:
+    """本地测试用：只把告警保存在内存里"""
+
+    name = "stub"
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, alerts: list):
+        self.sent.extend(alerts)
+
+
+def build_sinks(spec: str = MONITOR_CONFIG["sinks"]) -> list:
+    """按逗号分隔的名称创建输出端，未知名称忽略"""
+    sinks = []
+    for name in (s.strip() for s in spec.split(",")):
+        if name == "stdout":
+            sinks.append(StdoutSink())
+        elif name == "file":
+            sinks.append(FileSink())
+        elif name == "webhook":
+            if MONITOR_CONFIG["webhook_url"]:
+                sinks.append(WebhookSink(MONITOR_CONFIG["webhook_url"]))
+            else:
+                print("ALERT_WEBHOOK_URL not set, skipping webhook sink")
+        elif name == "stub":
+            sinks.append(StubSink())
+        elif name:
+            print(f"Unknown alert sink '{name}', skipping")
+    return sinks
+
+
+def dispatch(sinks: list, items: list) -> int:
+    """把条目推送到所有输出端；单个输出端失败不影响其他输出端，返回推送条数"""
+    if not items:
+        return 0
+    alerts = [alert_payload(item) for item in items]
+    for sink in sinks:
+        try:
+            sink.send(alerts)
+            metrics.inc("alerts_sent_total", len(alerts), sink=sink.name)
+        except Exception as e:
+            metrics.inc("alert_errors_total", sink=sink.name)
+            print(f"Alert sink {sink.name} failed: {e}")
+    return len(alerts)
@@ -0,0 +1,98 @@
+"""分析结果缓存 - 按内容哈希 + 提示词/模型版本存储 parse_k2_response 的结果"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import ANALYSIS_CACHE_CONFIG, ANALYZE_CONFIG, DATA_DIR
+
+CACHE_DB = os.path.join(DATA_DIR, "analysis_cache.db")
+
+
+def normalize_content(content: str) -> str:
+    """统一 Unicode 形式和空白，避免格式差异导致缓存未命中"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", content)).strip()
+
+
+def content_key(content: str, model: str) -> str:
+    """缓存键：提示词版本 + 给出结果的模型 + 规范化内容的哈希"""
+    raw = "\x1f".join([
+        ANALYZE_CONFIG["prompt_version"],
+        model,
+        normalize_content(content),
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """基于 SQLite 的分析结果缓存，支持按条数和时间淘汰"""
+
+    def __init__(self, path: str = CACHE_DB):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS analysis (
+                key TEXT PRIMARY KEY,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON analysis (accessed_at)")
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: list) -> dict:
+        """批量查询，返回 {key: result}；过期条目视为未命中"""
+        found = {}
+        min_created = time.time() - ANALYSIS_CACHE_CONFIG["max_age_days"] * 86400
+        unique = list(dict.fromkeys(keys))
+        # SQLite 单条语句的参数个数有限，分块查询
+        for i in range(0, len(unique), 500):
+            chunk = unique[i:i + 500]
+            rows = self.conn.execute(
+                f"SELECT key, result FROM analysis WHERE created_at >= ? "
+                f"AND key IN ({','.join('?' * len(chunk))})",
+                [min_created, *chunk],
+            ).fetchall()
+            found.update((key, json.loads(result)) for key, result in rows)
+        if found:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE analysis SET accessed_at = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self.conn.commit()
+        self.hits += sum(1 for k in keys if k in found)
+        self.misses += sum(1 for k in keys if k not in found)
+        return found
+
+    def put_many(self, results: dict):
+        """批量写入 {key: result}"""
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO analysis (key, result, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+            [(key, json.dumps(result, ensure_ascii=False), now, now) for key, result in results.items()],
+        )
+        self.conn.commit()
+
+    def evict(self) -> int:
+        """删除过期条目，并把总条数压到上限以内，返回删除数量"""
+        min_created = time.time() - ANALYSIS_CACHE_CONFIG["max_age_days"] * 86400
+        removed = self.conn.execute("DELETE FROM analysis WHERE created_at < ?", (min_created,)).rowcount
+        removed += self.conn.execute(
+            """DELETE FROM analysis WHERE key IN (
+                SELECT key FROM analysis ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )""",
+            (ANALYSIS_CACHE_CONFIG["max_entries"],),
+        ).rowcount
+        self.conn.commit()
+        return removed
+
+    def close(self):
+        self.conn.close()
@@ -1,146 +1,329 @@
 """使用 K2.5 模型分析并分类情报"""
 import json
+import math
 import os
+import re
 import sys
-from datetime import datetime
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeout
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent))
-from config import DATA_DIR, PRIORITY_LEVELS
+import deadline
+import metrics
+from accounts import get_registry
+from analysis_cache import AnalysisCache, content_key
+from classifier import FALLBACK_NOTE, PRIORITY_RANK, classify
+from config import ANALYZE_CONFIG, DATA_DIR, PROMPT_CONFIG, RUN_CONFIG, TRIAGE_CONFIG
+from dedupe import cluster_items, item_text, pick_representative
+from item_store import ItemStore
+from llm_backends import get_backends
+from prompt_builder import compact, estimate_tokens, pack_batches
+from triage import CLASSES, TRIAGE_NOTE, get_model
+
+
+# 分析结果的取值范围，解析时按此校验
+PRIORITIES = ("P1", "P2", "P3")
+CATEGORIES = ("监管政策", "执法行动", "机构动态", "项目更新", "市场影响", "其他")
+IMPACTS = ("正面", "负面", "中性")
+
+# 输出格式与分类标准：每条结果一行 JSON。每批提示只在开头出现一次，
+# 作为固定前缀放在条目之前，支持前缀缓存的服务可以复用
+OUTPUT_FORMAT = """每条内容输出一行 JSON 对象（不要换行、代码块或其他文字），字段：
+{"id": 条目编号, "title": "中文标题（20字以内）", "summary": "中文摘要（100字以内）", "priority": "P1/P2/P3", "category": "监管政策/执法行动/机构动态/项目更新/市场影响/其他", "impact": "正面/负面/中性", "related_tokens": "相关代币或项目", "suggested_action": "建议采取的行动"}"""
+
+PRIORITY_GUIDE = """分类标准：
+- P1(紧急): 监管政策变化、重大执法行动、交易所下架、禁令、重大安全事件
+- P2(重要): 合规指南更新、行业自律、重要诉讼、牌照变动、机构大额持仓变化
+- P3(一般): 行业动态、研究报告、一般新闻、观点分析、技术更新"""
+
+INSTRUCTIONS = f"""你是一位加密货币合规专家。请逐条分析下面的内容。
+
+{OUTPUT_FORMAT}
+
+{PRIORITY_GUIDE}
+
+id 与条目编号一致，每条内容恰好输出一行，不要遗漏。"""
+
+# 响应中的结果行：整行是一个 JSON 对象（容忍行尾逗号，兼容模型把数组分行输出的情况），
+# 或整行是一个 JSON 数组（模型把所有结果输出在一行）
+RESULT_LINE_RE = re.compile(r"^[ \t]*(\{.*\}|\[.*\])[ \t]*,?[ \t]*$", re.MULTILINE)
+
+
+def call_k2(prompt: str, timeout: float) -> tuple:
+    """调用 K2.5：按配置的后端依次尝试（主后端失败时退回 openclaw CLI）
+
+    返回 (响应, 给出响应的模型)，全部失败时返回 ("", "")。
+    """
+    call_deadline = time.monotonic() + timeout
+    for backend in get_backends():
+        remaining = call_deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        try:
+            with metrics.timer("llm_call_seconds", backend=backend.name):
+                response = backend.complete(prompt, remaining)
+            metrics.inc("llm_calls_total", backend=backend.name, status="ok")
+            return response.strip(), backend.model
+        except Exception as e:
+            metrics.inc("llm_calls_total", backend=backend.name, status="failed")
+            print(f"LLM backend {backend.name} failed: {e}")
+    return "", ""
 
 
 def analyze_with_k2(content: str, source_type: str = "tweet") -> dict:
     """调用 K2.5 模型分析内容"""
-    
-    # 构建分析提示
-    prompt = f"""你是一位加密货币合规专家。请分析以下内容并输出结构化结果。
+    response, model = call_k2(build_batch_prompt([content]), ANALYZE_CONFIG["timeout"])
+    if response:
+        return parse_k2_response(response, content, model)
+    # 如果 OpenClaw 失败，使用备用分析
+    print("OpenClaw failed, using fallback analysis")
+    return fallback_analysis(content)
 
-原始内容：
-{content[:1500]}
 
-请按以下格式输出：
+def build_batch_prompt(contents: list) -> str:
+    """共用说明在前，随后是压缩到 token 预算内的各条内容"""
+    blocks = "\n\n".join(
+        f"=== 条目 {i} ===\n{compact(content)}" for i, content in enumerate(contents, 1)
+    )
+    prompt = f"{INSTRUCTIONS}\n\n{blocks}"
+    metrics.inc("llm_prompt_tokens_total", estimate_tokens(prompt))
+    return prompt
 
-【中文标题】：用一句话概括（20字以内）
-【中文摘要】：详细摘要（100字以内，包含关键信息）
-【优先级】：P1/P2/P3
-【分类】：监管政策/执法行动/机构动态/项目更新/市场影响/其他
-【影响评估】：正面/负面/中性
-【相关代币/项目】：列出可能影响的代币或项目（如有）
-【建议行动】：观察者应该采取什么行动
 
-分类标准：
-- P1(紧急): 监管政策变化、重大执法行动、交易所下架、禁令、重大安全事件
-- P2(重要): 合规指南更新、行业自律、重要诉讼、牌照变动、机构大额持仓变化
-- P3(一般): 行业动态、研究报告、一般新闻、观点分析、技术更新
+def parse_results(response: str) -> dict:
+    """单次扫描响应中的 JSON 结果行，校验后返回 {条目编号: (结果, 原始行)}
+
+    无法解析或不符合格式的行跳过并计数，其余结果照常使用；没有编号的结果按出现顺序编号。
+    """
+    results = {}
+    if "{" not in response:
+        metrics.inc("llm_parse_errors_total", reason="no_json")
+        return results
+    position = 0
+    for m in RESULT_LINE_RE.finditer(response):
+        try:
+            parsed = json.loads(m.group(1))
+        except ValueError:
+            position += 1
+            metrics.inc("llm_parse_errors_total", reason="json")
+            continue
+        if isinstance(parsed, list):
+            entries = [(obj, json.dumps(obj, ensure_ascii=False)) for obj in parsed]
+        else:
+            entries = [(parsed, m.group(1))]
+        for obj, raw in entries:
+            position += 1
+            result = validate_result(obj)
+            if result is None:
+                metrics.inc("llm_parse_errors_total", reason="schema")
+                continue
+            try:
+                index = int(obj.get("id", position))
+            except (TypeError, ValueError):
+                index = position
+            results.setdefault(index, (result, raw))
+    return results
+
+
+def validate_result(obj) -> dict:
+    """校验单条结果：priority 必须合法，其余字段规范化；不合格时返回 None"""
+    if not isinstance(obj, dict):
+        return None
+    priority = str(obj.get("priority", "")).strip().upper()
+    if priority not in PRIORITIES:
+        return None
+    tokens = obj.get("related_tokens", "")
+    if isinstance(tokens, list):
+        tokens = "、".join(str(t) for t in tokens)
+    category = str(obj.get("category", "")).strip()
+    impact = str(obj.get("impact", "")).strip()
+    return {
+        "priority": priority,
+        "title": str(obj.get("title", "")).strip(),
+        "summary": str(obj.get("summary", "")).strip(),
+        "category": category if category in CATEGORIES else "其他",
+        "impact": impact if impact in IMPACTS else "中性",
+        "related_tokens": str(tokens).strip(),
+        "suggested_action": str(obj.get("suggested_action", "")).strip(),
+    }
+
+
+def analyze_batch(contents: list, timeout: float) -> list:
+    """一次调用分析一批内容，缺失的条目使用备用分析"""
+    response, model = call_k2(build_batch_prompt(contents), timeout)
+    parsed = parse_results(response) if response else {}
+    metrics.inc("llm_batch_items_total", len(contents))
+    covered = sum(1 for i in range(1, len(contents) + 1) if i in parsed)
+    if covered < len(contents):
+        metrics.inc("fallback_items_total", len(contents) - covered, reason="missing")
+        print(f"Batch response covered {covered}/{len(contents)} items, using fallback for the rest")
+    return [
+        build_result(*parsed[i], content, model) if i in parsed else fallback_analysis(content)
+        for i, content in enumerate(contents, 1)
+    ]
+
 
-请确保输出格式严格遵循上述模板。"""
+def analyze_contents(contents: list) -> list:
+    """分析一组内容：先查缓存，只把未命中的内容交给 LLM
 
+    缓存按主后端的模型查询；备用后端给出的结果按实际模型写入，不会被当作主模型的结果命中。
+    """
+    model = get_backends()[0].model
+    cache = AnalysisCache()
     try:
-        # 尝试通过 OpenClaw 调用 K2.5
-        import subprocess
-        result = subprocess.run(
-            ["openclaw", "ask", "--model", "kimi-coding/k2p5", prompt],
-            capture_output=True,
-            text=True,
-            timeout=120
-        )
+        keys = [content_key(c, model) for c in contents]
+        cached = cache.get_many(keys)
+        metrics.inc("analysis_cache_hits_total", len(cached))
+        metrics.inc("analysis_cache_misses_total", len(contents) - len(cached))
+        print(f"Analysis cache: {len(cached)} hits, {len(contents) - len(cached)} misses")
         
-        if result.returncode == 0 and result.stdout.strip():
-            response = result.stdout.strip()
-            return parse_k2_response(response, content)
-        else:
-            # 如果 OpenClaw 失败，使用备用分析
-            print(f"OpenClaw failed, using fallback analysis")
-            return fallback_analysis(content)
-            
-    except Exception as e:
-        print(f"Analysis error: {e}")
-        return fallback_analysis(content)
-
-
-def parse_k2_response(response: str, original_content: str) -> dict:
-    """解析 K2.5 的响应"""
-    result = {
-        "priority": "P3",
-        "title": "",
-        "summary": "",
-        "category": "其他",
-        "impact": "中性",
-        "related_tokens": "",
-        "suggested_action": "",
-        "raw_analysis": response,
-    }
-    
-    lines = response.split("\n")
-    current_field = None
-    
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # 提取各字段
-        if "【中文标题】" in line or "标题】" in line:
-            result["title"] = line.split("】", 1)[-1].strip().replace("：", "").replace(":", "")
-        elif "【中文摘要】" in line or "摘要】" in line:
-            result["summary"] = line.split("】", 1)[-1].strip().replace("：", "").replace(":", "")
-        elif "【优先级】" in line or "优先级】" in line:
-            p = line.split("】", 1)[-1].strip().replace("：", "").replace(":", "")
-            if "P1" in p:
-                result["priority"] = "P1"
-            elif "P2" in p:
-                result["priority"] = "P2"
-            else:
-                result["priority"] = "P3"
-        elif "【分类】" in line or "分类】" in line:
-            result["category"] = line.split("】", 1)[-1].strip().replace("：", "").replace(":", "")
-        elif "【影响评估】" in line or "影响】" in line:
-            result["impact"] = line.split("】", 1)[-1].strip().replace("：", "").replace(":", "")
-        elif "【相关代币" in line or "代币】" in line:
-            result["related_tokens"] = line.split("】", 1)[-1].strip().replace("：", "").replace(":", "")
-        elif "【建议行动】" in line or "行动】" in line or "建议】" in line:
-            result["suggested_action"] = line.split("】", 1)[-1].strip().replace("：", "").replace(":", "")
+        # 同一内容在本次运行中只分析一次
+        pending = {}
+        for key, content in zip(keys, contents):
+            if key not in cached and key not in pending:
+                pending[key] = content
+        
+        # 本地模型判定为明显 P3 的内容不交给 LLM
+        fresh = prefilter(pending)
+        llm_keys = [k for k in pending if k not in fresh]
+        fresh.update(zip(llm_keys, analyze_uncached([pending[k] for k in llm_keys])))
+        # 备用分析和预筛的结果不写入缓存，下次仍交给 LLM
+        cache.put_many({
+            content_key(pending[k], v["model"]): v
+            for k, v in fresh.items() if v["raw_analysis"] not in (FALLBACK_NOTE, TRIAGE_NOTE)
+        })
+        cache.evict()
+    finally:
+        cache.close()
     
-    # 如果没有解析到标题，使用原文前20字
+    results = {**cached, **fresh}
+    return [dict(results[key]) for key in keys]
+
+
+def prefilter(pending: dict) -> dict:
+    """用本地分级模型批量打分，返回可跳过 LLM 的 {key: 分析结果}
+
+    只跳过模型有把握判为 P3、且关键词分类也为 P3 的内容，P1/P2 候选和不确定的仍交给 LLM。
+    """
+    model = get_model()
+    if model is None or not pending:
+        return {}
+    keys = list(pending)
+    p3 = model.predict_proba([pending[k] for k in keys])[:, CLASSES.index("P3")]
+    skipped = {}
+    for key, score in zip(keys, p3):
+        if score >= TRIAGE_CONFIG["skip_threshold"] and classify(pending[key])[0] == "P3":
+            skipped[key] = {**fallback_analysis(pending[key]), "priority": "P3", "raw_analysis": TRIAGE_NOTE}
+    metrics.inc("triage_skipped_total", len(skipped))
+    print(f"Triage: {len(skipped)}/{len(keys)} items skipped as P3")
+    return skipped
+
+
+def analyze_uncached(contents: list) -> list:
+    """分批并发分析，在分析阶段时限内尽量完成；超时或被放弃的批次使用备用分析
+
+    按关键词分级排序后装箱，P1/P2 候选先提交，临近时限时被放弃的总是 P3 候选。
+    """
+    if not contents:
+        return []
+
+    ranks = [PRIORITY_RANK[classify(c)[0]] for c in contents]
+    order = sorted(range(len(contents)), key=lambda i: ranks[i])
+    batches, start = [], 0
+    for batch in pack_batches([contents[i] for i in order], ANALYZE_CONFIG["batch_size"], PROMPT_CONFIG["batch_tokens"]):
+        batches.append(order[start:start + len(batch)])
+        start += len(batch)
+
+    backend = get_backends()[0].name
+    shed = shed_batches([min(ranks[i] for i in batch) for batch in batches], backend)
+    results = [None] * len(batches)
+
+    def run(batch):
+        # 单批超时按观测延迟自适应，且不超过阶段剩余时间，保证阶段按时结束
+        timeout = deadline.adaptive_timeout(
+            "llm_call_seconds", ANALYZE_CONFIG["timeout"], RUN_CONFIG["llm_min_timeout"],
+            stage="analyze", backend=backend,
+        )
+        if timeout <= 0:
+            return [fallback_analysis(contents[i]) for i in batch]
+        return analyze_batch([contents[i] for i in batch], timeout)
+
+    pool = ThreadPoolExecutor(max_workers=ANALYZE_CONFIG["workers"])
+    futures = {pool.submit(run, batch): i for i, batch in enumerate(batches) if i not in shed}
+    try:
+        done = 0
+        remaining = max(0, deadline.stage_remaining("analyze"))
+        for future in as_completed(futures, timeout=remaining):
+            results[futures[future]] = future.result()
+            done += 1
+            print(f"[{done}/{len(futures)}] batches analyzed")
+    except FuturesTimeout:
+        print("Analysis deadline reached, falling back for unfinished batches")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    analyses = [None] * len(contents)
+    for j, (batch, result) in enumerate(zip(batches, results)):
+        if result is None:
+            metrics.inc("fallback_items_total", len(batch), reason="shed" if j in shed else "deadline")
+            result = [fallback_analysis(contents[i]) for i in batch]
+        for i, analysis in zip(batch, result):
+            analyses[i] = analysis
+    return analyses
+
+
+def shed_batches(batch_ranks: list, backend: str) -> set:
+    """按已知的调用延迟预估分析耗时，超出阶段剩余时间时从末尾放弃只含 P3 候选的批次，返回放弃的批次下标
+
+    没有延迟数据时不预先放弃，由阶段时限兜底。
+    """
+    latency = deadline.p95("llm_call_seconds", backend=backend)
+    if latency is None:
+        return set()
+    remaining = deadline.stage_remaining("analyze")
+    workers = ANALYZE_CONFIG["workers"]
+    shed = set()
+    for j in reversed(range(len(batch_ranks))):
+        if batch_ranks[j] < PRIORITY_RANK["P3"] or math.ceil((j + 1) / workers) * latency <= remaining:
+            break
+        shed.add(j)
+    if shed:
+        metrics.inc("work_shed_total", len(shed), kind="p3_batch")
+        print(f"Analysis budget tight ({remaining:.0f}s left), skipping {len(shed)} P3 candidate batches")
+    return shed
+
+
+def parse_k2_response(response: str, original_content: str, model: str) -> dict:
+    """解析 K2.5 对单条内容的响应，没有合格结果时使用备用分析"""
+    parsed = parse_results(response)
+    if not parsed:
+        metrics.inc("fallback_items_total", reason="unparsed")
+        return fallback_analysis(original_content)
+    result, raw = parsed.get(1) or next(iter(parsed.values()))
+    return build_result(result, raw, original_content, model)
+
+
+def build_result(result: dict, raw: str, original_content: str, model: str) -> dict:
+    """补全标题和摘要，附上原始结果行和给出结果的模型"""
+    result = {**result, "raw_analysis": raw, "model": model}
+    # 如果没有标题，使用原文前20字
     if not result["title"]:
         result["title"] = original_content[:20] + "..." if len(original_content) > 20 else original_content
-    
-    # 如果没有解析到摘要，使用原文前100字
+    # 如果没有摘要，使用原文前100字
     if not result["summary"]:
         result["summary"] = original_content[:100] + "..." if len(original_content) > 100 else original_content
-    
     return result
 
 
 def fallback_analysis(content: str) -> dict:
     """备用分析（当 K2.5 不可用时）"""
-    content_lower = content.lower()
-    
-    # P1 关键词
-    p1_keywords = [
-        "sec charges", "sec lawsuit", "enforcement action", "ban", "prohibition",
-        "crackdown", "shutdown", "fine", "penalty", "violation",
-        "regulatory action", "cease and desist", "settlement",
-        "执法", "禁令", "处罚", "罚款", "关闭", "违规"
-    ]
-    
-    # P2 关键词
-    p2_keywords = [
-        "guidance", "proposal", "framework", "compliance", "licensing",
-        "registration", "disclosure", "transparency", "oversight",
-        "指南", "合规", "牌照", "注册", "披露"
-    ]
-    
-    # 判断优先级
-    priority = "P3"
-    category = "其他"
-    
-    if any(k in content_lower for k in p1_keywords):
-        priority = "P1"
-        category = "执法行动"
-    elif any(k in content_lower for k in p2_keywords):
-        priority = "P2"
-        category = "监管政策"
+    # 分类由共享的关键词分类器判定；有本地模型时优先级以模型为准
+    priority, category = classify(content)
+    model = get_model()
+    if model is not None:
+        priority = model.predict([content])[0]
     
     # 生成中文标题和摘要（简单翻译/概括）
     title = content[:20] + "..." if len(content) > 20 else content
@@ -154,13 +337,12 @@ def fallback_analysis(content: str) -> dict:
         "impact": "中性",
         "related_tokens": "",
         "suggested_action": "持续关注" if priority == "P3" else "立即评估影响",
-        "raw_analysis": "基于关键词匹配的备用分析",
+        "raw_analysis": FALLBACK_NOTE,
     }
 
 
 def extract_recommended_accounts(items: list) -> list:
     """从分析内容中提取推荐添加的账号"""
-    import re
     from collections import Counter
     
     # 提取所有 @提及的账号
@@ -173,18 +355,13 @@ def extract_recommended_accounts(items: list) -> list:
     # 统计频率
     account_counts = Counter(mentioned_accounts)
     
-    # 获取当前监控的账号列表
-    current_accounts = set()
-    config_file = os.path.join(os.path.dirname(__file__), "..", "config", "accounts.json")
-    if os.path.exists(config_file):
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = json.load(f)
-            current_accounts = {a["username"].lower() for a in config.get("accounts", [])}
+    # 当前监控的账号（含未启用）
+    registry = get_registry()
     
     # 过滤已监控的账号，返回推荐列表
     recommendations = []
     for username, count in account_counts.most_common(10):
-        if username.lower() not in current_accounts and count >= 2:
+        if username not in registry and count >= 2:
             # 判断类别
             category = "未知"
             if any(k in username.lower() for k in ["sec", "cftc", "fed", "treasury"]):
@@ -204,76 +381,78 @@ def extract_recommended_accounts(items: list) -> list:
     return recommendations[:5]  # 返回前5个
 
 
-def main():
-    """主函数"""
-    # 加载数据
-    x_data = []
-    rss_data = []
-    
-    x_file = os.path.join(DATA_DIR, "x_data.json")
-    rss_file = os.path.join(DATA_DIR, "rss_data.json")
+@metrics.stage("analyze")
+def analyze_items(pending: list) -> list:
+    """聚类并分析一组条目，返回按优先级排序的分析结果"""
+    # 分析阶段的时限从这里开始计算
+    deadline.stage_deadline("analyze")
+    # 近似重复聚类，每个事件只把一条代表交给 LLM
+    clusters = cluster_items(pending)
+    representatives = [pick_representative(cluster) for cluster in clusters]
+    metrics.inc("stories_total", len(clusters))
+    print(f"Clustered into {len(clusters)} stories")
     
-    if os.path.exists(x_file):
-        with open(x_file, "r", encoding="utf-8") as f:
-            x_data = json.load(f)
+    # 分析所有代表（批量并发，受全局时限约束）
+    analyses = analyze_contents([item_text(item) for item in representatives])
     
-    if os.path.exists(rss_file):
-        with open(rss_file, "r", encoding="utf-8") as f:
-            rss_data = json.load(f)
-    
-    print(f"Loaded {len(x_data)} tweets, {len(rss_data)} articles")
-    
-    # 分析所有内容
-    analyzed_items = []
-    
-    # 分析推文（限制数量避免超时）
-    for i, item in enumerate(x_data[:10]):  # 限制分析数量避免超时
-        print(f"[{i+1}/10] Analyzing tweet from @{item.get('author', 'unknown')}...")
-        content = item.get("text", "")
-        analysis = analyze_with_k2(content, "tweet")
-        analyzed_items.append({
-            **item,
-            **analysis,
-            "type": "tweet",
-        })
-    
-    # 分析 RSS 文章
-    for i, item in enumerate(rss_data[:5]):
-        print(f"[{i+1}/5] Analyzing article: {item.get('title', '')[:30]}...")
-        content = f"{item.get('title', '')} {item.get('summary', '')}"
-        analysis = analyze_with_k2(content, "article")
-        analyzed_items.append({
+    # 簇内所有条目共享代表的分析结果
+    analyzed_items = [
+        {
             **item,
             **analysis,
-            "type": "article",
-        })
+            # 保留送去分析的原文，分析结果会覆盖文章的标题和摘要，本地模型训练时需要原文
+            "source_text": item_text(item),
+            "type": "tweet" if item.get("source") == "x" else "article",
+            "cluster_size": len(cluster),
+        }
+        for cluster, analysis in zip(clusters, analyses)
+        for item in cluster
+    ]
     
     # 按优先级排序
     priority_order = {"P1": 0, "P2": 1, "P3": 2}
     analyzed_items.sort(key=lambda x: priority_order.get(x["priority"], 3))
     
-    # 提取推荐账号
+    metrics.inc("items_analyzed_total", len(analyzed_items))
+    return analyzed_items
+
+
+def save_recommendations(analyzed_items: list) -> list:
+    """提取推荐账号并保存到 recommendations.json"""
     recommendations = extract_recommended_accounts(analyzed_items)
-    
-    # 保存分析结果
-    output_file = os.path.join(DATA_DIR, "analyzed_data.json")
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(analyzed_items, f, ensure_ascii=False, indent=2)
-    
-    # 保存推荐账号
     rec_file = os.path.join(DATA_DIR, "recommendations.json")
     with open(rec_file, "w", encoding="utf-8") as f:
         json.dump(recommendations, f, ensure_ascii=False, indent=2)
+    return recommendations
+
+
+def main():
+    """主函数"""
+    # 从条目库加载尚未分析的内容
+    store = ItemStore()
+    pending = store.unanalyzed()
+    x_count = sum(1 for item in pending if item.get("source") == "x")
+    
+    print(f"Loaded {x_count} tweets, {len(pending) - x_count} articles")
+    
+    analyzed_items = analyze_items(pending)
+    
+    # 分析结果回写条目库
+    store.save_analysis(analyzed_items)
+    store.close()
+    
+    # 保存推荐账号
+    recommendations = save_recommendations(analyzed_items)
     
     print(f"\nAnalyzed {len(analyzed_items)} items")
     print(f"P1: {sum(1 for i in analyzed_items if i['priority'] == 'P1')}")
     print(f"P2: {sum(1 for i in analyzed_items if i['priority'] == 'P2')}")
     print(f"P3: {sum(1 for i in analyzed_items if i['priority'] == 'P3')}")
     print(f"Recommendations: {len(recommendations)}")
-    print(f"Saved to: {output_file}")
     
     return analyzed_items, recommendations
 
 
 if __name__ == "__main__":
     main()
+    metrics.write_report("analyze")
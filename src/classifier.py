@@ -0,0 +1,109 @@
+"""关键词分类器 - 所有优先级/分类规则编译为一个正则，一次扫描得到全部命中"""
+import re
+from collections import namedtuple
+
+Rule = namedtuple("Rule", ["keyword", "priority", "category"])
+
+# 规则表：(关键词, 优先级, 分类)。英文按词边界匹配并允许常见词形变化，中文按子串匹配
+RULES = [
+    # P1 - 执法、禁令、处罚
+    # charge、enforcement、ban 单独出现多为“收费”“执法部门”“乐队”等无关用法，只按短语匹配
+    Rule("sec charge", "P1", "执法行动"),
+    Rule("charged with", "P1", "执法行动"),
+    Rule("criminal charge", "P1", "执法行动"),
+    Rule("settle charge", "P1", "执法行动"),
+    Rule("sec lawsuit", "P1", "执法行动"),
+    Rule("sec sue", "P1", "执法行动"),
+    Rule("enforcement action", "P1", "执法行动"),
+    Rule("sued", "P1", "执法行动"),
+    Rule("ban on", "P1", "执法行动"),
+    Rule("crypto ban", "P1", "执法行动"),
+    Rule("trading ban", "P1", "执法行动"),
+    Rule("banned", "P1", "执法行动"),
+    Rule("prohibition", "P1", "执法行动"),
+    Rule("crackdown", "P1", "执法行动"),
+    Rule("shutdown", "P1", "执法行动"),
+    Rule("fined", "P1", "执法行动"),
+    Rule("fines", "P1", "执法行动"),
+    Rule("penalty", "P1", "执法行动"),
+    Rule("penalties", "P1", "执法行动"),
+    Rule("violation", "P1", "执法行动"),
+    Rule("regulatory action", "P1", "执法行动"),
+    Rule("cease and desist", "P1", "执法行动"),
+    Rule("settlement", "P1", "执法行动"),
+    Rule("delisting", "P1", "执法行动"),
+    Rule("执法", "P1", "执法行动"),
+    Rule("禁令", "P1", "执法行动"),
+    Rule("处罚", "P1", "执法行动"),
+    Rule("罚款", "P1", "执法行动"),
+    Rule("关闭", "P1", "执法行动"),
+    Rule("违规", "P1", "执法行动"),
+    Rule("下架", "P1", "执法行动"),
+    # P2 - 监管政策、合规指引、一般诉讼
+    Rule("lawsuit", "P2", "执法行动"),
+    Rule("regulation", "P2", "监管政策"),
+    Rule("guidance", "P2", "监管政策"),
+    Rule("proposal", "P2", "监管政策"),
+    Rule("framework", "P2", "监管政策"),
+    Rule("compliance", "P2", "监管政策"),
+    Rule("licensing", "P2", "监管政策"),
+    Rule("license", "P2", "监管政策"),
+    Rule("registration", "P2", "监管政策"),
+    Rule("disclosure", "P2", "监管政策"),
+    Rule("transparency", "P2", "监管政策"),
+    Rule("oversight", "P2", "监管政策"),
+    Rule("监管", "P2", "监管政策"),
+    Rule("指南", "P2", "监管政策"),
+    Rule("合规", "P2", "监管政策"),
+    Rule("牌照", "P2", "监管政策"),
+    Rule("注册", "P2", "监管政策"),
+    Rule("披露", "P2", "监管政策"),
+]
+
+PRIORITY_RANK = {"P1": 0, "P2": 1, "P3": 2}
+
+# 备用分析结果的标记，这类结果不写入缓存，也不作为训练标签
+FALLBACK_NOTE = "基于关键词匹配的备用分析"
+
+
+def keyword_pattern(keyword: str) -> str:
+    """单条关键词的正则片段；英文末词允许 -s/-es/-ed/-ing 变形（以 e 结尾的词为 -e/-es/-ed/-ing）"""
+    words = [re.escape(word) for word in keyword.split()]
+    if not keyword.isascii():
+        return r"\s+".join(words)
+    last = keyword.split()[-1]
+    if last.endswith("e"):
+        words[-1] = re.escape(last[:-1]) + "(?:e|es|ed|ing)"
+    else:
+        words[-1] += "(?:s|es|ed|ing)?"
+    body = r"\s+".join(words)
+    return rf"(?<![a-z0-9]){body}(?![a-z0-9])"
+
+
+def compile_rules(rules: list):
+    """把规则编译为一个带命名分组的正则；较长的关键词优先匹配"""
+    order = sorted(range(len(rules)), key=lambda i: -len(rules[i].keyword))
+    return re.compile(
+        "|".join(f"(?P<r{i}>{keyword_pattern(rules[i].keyword)})" for i in order),
+        re.IGNORECASE,
+    )
+
+
+PATTERN = compile_rules(RULES)
+
+
+def match_rules(text: str) -> list:
+    """一次扫描返回全部命中的规则（去重，按出现顺序）"""
+    matched = {}
+    for m in PATTERN.finditer(text):
+        rule = RULES[int(m.lastgroup[1:])]
+        matched.setdefault(rule.keyword, rule)
+    return list(matched.values())
+
+
+def classify(text: str) -> tuple:
+    """返回 (优先级, 分类)，取命中规则中最高的优先级；无命中时为 P3/其他"""
+    best = min(match_rules(text), key=lambda r: PRIORITY_RANK[r.priority], default=None)
+    if best is None:
+        return "P3", "其他"
+    return best.priority, best.category
@@ -9,7 +9,23 @@ X_API_CONFIG = {
     "query_type": "Latest",
     "max_pages": 3,
     "timeout": 30,
-    "retry": 1,
+    "retry": 2,             # 失败后的重试次数
+    "request_budget": 300,  # 每次运行最多发出的请求数（含重试）
+    "max_query_length": 500,    # 合并查询的最大长度（advanced_search 限制）
+    "concurrency": 8,       # 并发请求数
+    "rate_limit": 5,        # 每秒最多请求数（twitterapi.io 配额）
+    "rate_burst": 5,        # 允许的突发请求数
+}
+
+# 账号轮询调度：在固定查询预算内按发帖频率和高优先级占比分配轮询
+SCHEDULER_CONFIG = {
+    "max_queries": 10,          # 每次运行最多发出的账号合并查询数
+    "max_interval_hours": 72,   # 超过该时长未轮询的账号必定入选
+    "min_interval_hours": 0.05, # 估算发帖频率时轮询间隔的下限（3 分钟）
+    "alpha": 0.3,               # 统计量的指数滑动平均系数
+    "priority_weights": {"high": 4, "medium": 2, "low": 1},
+    "hot_weight": 3,            # P1/P2 占比对得分的加权
+    "prior_rate": 0.5,          # 新账号的假定发帖频率（条/天）
 }
 
 # 搜索关键词 - 加密货币合规相关
@@ -34,10 +50,30 @@ RSS_FEEDS = [
     "https://theblock.co/rss.xml",
 ]
 
-# 数据目录（使用绝对路径）
+RSS_CONFIG = {
+    "concurrency": 8,       # 并发抓取的源数量
+    "timeout": 20,
+    "retry": 1,
+    "max_entries": 10,      # 每个源取前 N 条
+    "summary_chars": 500,   # 清洗 HTML 后保留的摘要长度
+}
+
+# HTTP 重试与熔断
+HTTP_CONFIG = {
+    "backoff_base": 1.0,        # 指数退避基数（秒），实际等待为 [0, base * 2^n] 内随机
+    "backoff_max": 30,          # 单次退避上限（秒）
+    "max_retry_after": 60,      # Retry-After 超过该值时放弃重试
+    "breaker_threshold": 5,     # 同一接口连续失败次数达到后熔断
+    "breaker_cooldown": 60,     # 熔断后多久放行一次试探请求（秒）
+}
+
+# 数据目录（使用绝对路径，可用环境变量改到其他位置，例如基准测试的临时目录）
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-OUTPUT_DIR = os.path.join(BASE_DIR, "docs")
+DATA_DIR = os.getenv("DATA_DIR") or os.path.join(BASE_DIR, "data")
+OUTPUT_DIR = os.getenv("OUTPUT_DIR") or os.path.join(BASE_DIR, "docs")
+
+# 检查点文件（NDJSON）压缩方式: "" / "gzip" / "zstd"
+DATA_COMPRESSION = os.getenv("DATA_COMPRESSION", "")
 
 # 确保目录存在
 os.makedirs(DATA_DIR, exist_ok=True)
@@ -50,5 +86,98 @@ PRIORITY_LEVELS = {
     "P3": "一般 - 行业动态、研究报告、一般新闻",
 }
 
-# 保留历史报告数量
+# 近似重复聚类（MinHash + LSH）
+DEDUPE_CONFIG = {
+    "num_perm": 72,         # MinHash 签名长度
+    "bands": 24,            # LSH 分桶数，num_perm 须能被整除；候选阈值约 (1/bands)^(bands/num_perm) ≈ 0.35，略低于 threshold
+    "threshold": 0.4,       # 估计 Jaccard 相似度达到该值视为同一事件
+    "shingle_size": 2,      # 词/字 n-gram 长度
+}
+
+# LLM 分析配置
+ANALYZE_CONFIG = {
+    "model": "kimi-coding/k2p5",
+    "batch_size": 16,       # 每次调用打包的条目数上限（同时受 PROMPT_CONFIG 的 token 预算限制）
+    "workers": 3,           # 并发调用数
+    "timeout": 180,         # 单次调用超时（秒）
+    "deadline": 1200,       # 整个分析阶段的时间上限（秒）
+    "prompt_version": "v3", # 修改提示词或输出格式时递增，使旧缓存失效
+}
+
+# 提示压缩：每条内容和每批提示的估算 token 预算
+PROMPT_CONFIG = {
+    "item_tokens": 200,     # 单条内容清洗后保留的上限，超出时按句子重要性取舍
+    "batch_tokens": 2400,   # 一批提示中所有条目的上限（不含共用的说明）
+    "item_overhead": 8,     # 每条的分隔行等额外开销
+}
+
+# LLM 调用后端："cli"（openclaw）、"http"（OpenAI 兼容接口，常驻连接池）、"stub"（测试）
+LLM_CONFIG = {
+    "backend": os.getenv("LLM_BACKEND", "cli"),
+    "api_base": os.getenv("LLM_API_BASE", ""),
+    "api_key": os.getenv("LLM_API_KEY", ""),
+    "model": os.getenv("LLM_API_MODEL", ""),   # 为空时使用 ANALYZE_CONFIG["model"]
+    "stream": True,         # 流式读取回复，首个 token 到达即开始接收
+    "fallback_cli": True,   # 主后端失败时改用 openclaw CLI
+}
+
+# 分析结果缓存（SQLite）
+ANALYSIS_CACHE_CONFIG = {
+    "max_entries": 20000,   # 超出后按最近访问时间淘汰
+    "max_age_days": 30,     # 超过天数的结果不再使用
+}
+
+# 本地分级模型：预筛明显的 P3，LLM 不可用时替代关键词分级
+TRIAGE_CONFIG = {
+    "enabled": True,
+    "dims": 1 << 18,        # 特征哈希维度
+    "epochs": 150,
+    "learning_rate": 0.5,
+    "l2": 1e-6,
+    "min_samples": 200,     # LLM 标签少于该数时不训练
+    "skip_threshold": 0.9,  # P3 概率达到该值且关键词也判为 P3 时跳过 LLM
+}
+
+# 保留历史报告数量（条目库按同样的天数保留）
 MAX_HISTORY = 30
+# 已见条目的去重记录保留天数，比条目库长，条目被清理后再次抓到也不会当作新条目
+SEEN_HISTORY = 365
+
+# 运行指标输出
+METRICS_CONFIG = {
+    "report_file": os.path.join(DATA_DIR, "run_report.json"),
+    # 设置后额外输出 Prometheus 文本格式，例如 node_exporter 的 textfile 目录
+    "prometheus_file": os.getenv("METRICS_PROM_FILE", ""),
+}
+
+# 常驻监控模式：持续轮询，P1 条目即时推送
+MONITOR_CONFIG = {
+    "poll_interval": 600,           # 两次轮询之间的间隔（秒）
+    "request_budget": 20,           # 每轮对 twitterapi.io 的请求上限
+    "report_interval": 12 * 3600,   # 重新生成静态报告的间隔（秒），0 表示不生成
+    "alert_max_age_hours": 24,      # 只推送近期发布的条目，避免首轮补抓刷屏
+    "sinks": os.getenv("ALERT_SINKS", "stdout"),  # 逗号分隔：stdout,file,webhook
+    "webhook_url": os.getenv("ALERT_WEBHOOK_URL", ""),
+    "alert_file": os.path.join(DATA_DIR, "alerts.ndjson"),
+}
+
+# 全文检索：条目库只保留 MAX_HISTORY 天，检索库单独保留更久
+SEARCH_CONFIG = {
+    "db": os.path.join(DATA_DIR, "search.db"),
+    "max_age_days": 365,
+    "export_days": 90,      # 导出到静态站点的天数
+    "export_shards": 32,    # 倒排表分片数
+    "export_chunk": 500,    # 每个文档元数据文件的条数
+}
+
+# 运行时限：整次运行的截止时间、各阶段预算和自适应超时
+RUN_CONFIG = {
+    "deadline": int(os.getenv("RUN_DEADLINE", "1500")),  # 抓取到报告生成的总时限（秒），需小于 CI 任务超时
+    "fetch_budget": 300,        # 抓取阶段（X 和 RSS 并发）的时间预算；分析阶段预算为 ANALYZE_CONFIG["deadline"]
+    "report_reserve": 120,      # 始终为生成报告保留的时间
+    "timeout_factor": 3,        # 自适应超时 = 观测 p95 × 系数，不超过各处配置的固定超时
+    "min_samples": 5,           # 本次运行样本不足时使用上次运行保存的 p95
+    "http_min_timeout": 5,
+    "llm_min_timeout": 30,
+    "latency_file": os.path.join(DATA_DIR, "latency.json"),
+}
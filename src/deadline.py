@@ -0,0 +1,111 @@
+"""运行时限 - 整次运行的截止时间、各阶段的时间预算，以及按观测延迟 p95 自适应的超时
+
+流程开始时调用 start_run()；各阶段用 stage_remaining() 查询剩余时间，临近时限时先放弃
+低价值的工作（P3 候选、非高优先级账号、关键词搜索），保证报告按时生成。
+单独运行某个脚本时没有总时限，阶段只受自身预算约束。
+"""
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import metrics
+from config import ANALYZE_CONFIG, RUN_CONFIG
+
+# 跨运行保存 p95 的延迟指标
+LATENCY_METRICS = ("http_request_seconds", "llm_call_seconds")
+
+_lock = threading.Lock()
+_run_deadline = None
+_reserve = 0.0
+_stage_deadlines = {}
+_latency = None
+
+
+def stage_budgets() -> dict:
+    """各阶段的时间预算（秒），调用时读取配置"""
+    return {"fetch": RUN_CONFIG["fetch_budget"], "analyze": ANALYZE_CONFIG["deadline"]}
+
+
+def start_run(total: float = None):
+    """开始一次运行（或常驻监控的一轮），重置各阶段的截止时间
+
+    报告保留时间不超过总时限的 1/4，总时限很短时各阶段仍有正的预算。
+    """
+    global _run_deadline, _reserve
+    total = total or RUN_CONFIG["deadline"]
+    with _lock:
+        _run_deadline = time.monotonic() + total
+        _reserve = min(RUN_CONFIG["report_reserve"], total / 4)
+        _stage_deadlines.clear()
+
+
+def stage_deadline(name: str) -> float:
+    """阶段截止时刻（monotonic）：首次查询时确定，取阶段预算和总时限（扣除报告保留时间）中较早者"""
+    with _lock:
+        if name not in _stage_deadlines:
+            end = time.monotonic() + stage_budgets().get(name, float("inf"))
+            if _run_deadline is not None:
+                end = min(end, _run_deadline - _reserve)
+            _stage_deadlines[name] = end
+        return _stage_deadlines[name]
+
+
+def stage_remaining(name: str) -> float:
+    return stage_deadline(name) - time.monotonic()
+
+
+def run_remaining() -> float:
+    """距总时限的剩余秒数，未调用 start_run() 时为无穷大"""
+    return float("inf") if _run_deadline is None else _run_deadline - time.monotonic()
+
+
+def latency_key(name: str, labels: dict) -> str:
+    return name + "".join(f",{k}={v}" for k, v in sorted(labels.items()))
+
+
+def load_latency() -> dict:
+    """上次运行保存的 p95：{指标键: 秒}"""
+    global _latency
+    with _lock:
+        if _latency is None:
+            _latency = {}
+            if os.path.exists(RUN_CONFIG["latency_file"]):
+                try:
+                    with open(RUN_CONFIG["latency_file"], "r", encoding="utf-8") as f:
+                        _latency = json.load(f)
+                except (OSError, ValueError):
+                    _latency = {}
+        return _latency
+
+
+def save_latency():
+    """把本次运行的 p95 与已保存的值取平均后写回，平滑单次运行的波动"""
+    saved = dict(load_latency())
+    for h in metrics.snapshot()["histograms"]:
+        if h["name"] not in LATENCY_METRICS or h["count"] < RUN_CONFIG["min_samples"]:
+            continue
+        key = latency_key(h["name"], h["labels"])
+        saved[key] = round(h["p95"] if key not in saved else (saved[key] + h["p95"]) / 2, 4)
+    os.makedirs(os.path.dirname(RUN_CONFIG["latency_file"]), exist_ok=True)
+    with open(RUN_CONFIG["latency_file"], "w", encoding="utf-8") as f:
+        json.dump(saved, f, indent=2, sort_keys=True)
+
+
+def p95(name: str, **labels) -> float:
+    """观测延迟的 p95：本次样本足够时用本次的，否则用上次保存的；都没有时返回 None"""
+    if metrics.count(name, **labels) >= RUN_CONFIG["min_samples"]:
+        return metrics.quantile(name, 0.95, **labels)
+    return load_latency().get(latency_key(name, labels))
+
+
+def adaptive_timeout(name: str, default: float, floor: float, stage: str = None, **labels) -> float:
+    """超时 = p95 × 系数，限制在 [floor, default] 内；给定阶段时不超过阶段剩余时间（可能 ≤ 0）"""
+    observed = p95(name, **labels)
+    timeout = default if observed is None else min(default, max(floor, observed * RUN_CONFIG["timeout_factor"]))
+    if stage:
+        timeout = min(timeout, stage_remaining(stage))
+    return timeout
@@ -0,0 +1,119 @@
+"""近似重复聚类 - 用 MinHash + LSH 把 X 和 RSS 中的同一事件归为一组"""
+import random
+import re
+import sys
+import zlib
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import DEDUPE_CONFIG
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+# 固定种子，保证每次运行的签名一致
+_rng = random.Random(20260214)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(DEDUPE_CONFIG["num_perm"])
+]
+
+URL_RE = re.compile(r"https?://\S+")
+RETWEET_RE = re.compile(r"^rt @\w+:\s*")
+# 英文/数字按词切分，中文按单字切分
+TOKEN_RE = re.compile(r"[a-z0-9]+|[一-鿿]")
+
+
+def item_text(item: dict) -> str:
+    """取条目用于比较的原文"""
+    if item.get("source") == "x":
+        return item.get("text", "")
+    return f"{item.get('title', '')} {item.get('summary', '')}"
+
+
+def shingles(text: str) -> set:
+    """规范化文本并切分为 n-gram 集合"""
+    text = RETWEET_RE.sub("", URL_RE.sub(" ", text.lower()))
+    tokens = TOKEN_RE.findall(text)
+    size = DEDUPE_CONFIG["shingle_size"]
+    if len(tokens) <= size:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + size]) for i in range(len(tokens) - size + 1)}
+
+
+def minhash(features: set) -> tuple:
+    """计算 MinHash 签名"""
+    hashes = [zlib.crc32(f.encode("utf-8")) for f in features]
+    if not hashes:
+        return ()
+    return tuple(
+        min(((a * h + b) % MERSENNE_PRIME) & MAX_HASH for h in hashes)
+        for a, b in PERMUTATIONS
+    )
+
+
+def similarity(sig_a: tuple, sig_b: tuple) -> float:
+    """由签名估计 Jaccard 相似度"""
+    if not sig_a or not sig_b:
+        return 0.0
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def cluster_items(items: list) -> list:
+    """把条目聚成事件簇，返回簇列表（每簇为条目列表，按首次出现排序）"""
+    signatures = [minhash(shingles(item_text(item))) for item in items]
+    bands = DEDUPE_CONFIG["bands"]
+    rows = DEDUPE_CONFIG["num_perm"] // bands
+
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # LSH: 任一分段完全相同的条目成为候选对
+    buckets = defaultdict(list)
+    for i, sig in enumerate(signatures):
+        if not sig:
+            continue
+        for band in range(bands):
+            buckets[(band, sig[band * rows:(band + 1) * rows])].append(i)
+
+    # 桶内每个簇只保留一个代表，新成员只与各簇代表比较，避免桶内两两比较
+    for members in buckets.values():
+        reps = []
+        for j in members:
+            for i in reps:
+                if find(i) == find(j):
+                    break
+                if similarity(signatures[i], signatures[j]) >= DEDUPE_CONFIG["threshold"]:
+                    parent[find(j)] = find(i)
+                    break
+            else:
+                reps.append(j)
+
+    # 字典按插入顺序遍历，簇的顺序即首个成员的出现顺序
+    clusters = defaultdict(list)
+    for i, item in enumerate(items):
+        clusters[find(i)].append(item)
+    return list(clusters.values())
+
+
+def pick_representative(cluster: list) -> dict:
+    """选出簇代表：优先已分析的条目，其次内容最长的条目"""
+    return max(cluster, key=lambda item: (bool(item.get("priority")), len(item_text(item))))
+
+
+def cluster_sources(cluster: list) -> list:
+    """簇内各条目的来源，用于在报告中列出"""
+    sources = []
+    for item in cluster:
+        if item.get("source") == "x":
+            name = f"@{item.get('author', '')}"
+        else:
+            name = re.sub(r"^https?://(www\.)?", "", item.get("feed_url", "")).split("/")[0] or "RSS"
+        sources.append({"name": name, "url": item.get("url") or item.get("link") or "#"})
+    return sources
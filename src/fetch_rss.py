@@ -1,50 +1,130 @@
 """从 RSS 获取加密货币合规新闻"""
+import hashlib
 import json
 import os
 import sys
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from urllib.parse import urlparse
 
 import feedparser
 
 sys.path.insert(0, str(Path(__file__).parent))
-from config import DATA_DIR, RSS_FEEDS
+import deadline
+import http_client
+import metrics
+from config import DATA_DIR, RSS_CONFIG, RSS_FEEDS, RUN_CONFIG
+from item_store import ItemStore
+from prompt_builder import clean_text
 
+# 每个源的校验缓存: {url: {etag, last_modified, body_hash, articles}}
+CACHE_FILE = os.path.join(DATA_DIR, "rss_cache.json")
+
+
+def load_cache() -> dict:
+    """加载 RSS 校验缓存"""
+    if os.path.exists(CACHE_FILE):
+        try:
+            with open(CACHE_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable RSS cache: {e}")
+    return {}
+
+
+def save_cache(cache: dict):
+    """保存 RSS 校验缓存"""
+    with open(CACHE_FILE, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=2)
+
+
+def parse_entries(feed, url: str) -> list:
+    """将 feedparser 结果转换为文章列表"""
+    articles = []
+    for entry in feed.entries[:RSS_CONFIG["max_entries"]]:
+        article = {
+            "title": entry.get("title", ""),
+            "summary": clean_text(entry.get("summary", entry.get("description", "")))[:RSS_CONFIG["summary_chars"]],
+            "link": entry.get("link", ""),
+            "published": entry.get("published", ""),
+            "source": "rss",
+            "feed_url": url,
+        }
+        articles.append(article)
+    return articles
+
+
+def fetch_rss_feed(url: str, cached: dict = None) -> tuple:
+    """获取单个 RSS 源的新闻（条件请求）
+
+    返回 (articles, cache_entry, status)，status 为 fetched / not_modified / unchanged / error / skipped。
+    出错或抓取阶段已到时限时沿用缓存中的上一次结果。
+    """
+    cached = cached or {}
+    timeout = deadline.adaptive_timeout(
+        "http_request_seconds", RSS_CONFIG["timeout"], RUN_CONFIG["http_min_timeout"],
+        stage="fetch", host=urlparse(url).netloc,
+    )
+    if timeout <= 0:
+        metrics.inc("work_shed_total", kind="rss_feed")
+        return cached.get("articles", []), cached, "skipped"
+    headers = {}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
 
-def fetch_rss_feed(url: str) -> list:
-    """获取单个 RSS 源的新闻"""
     try:
-        feed = feedparser.parse(url)
-        articles = []
-        
-        for entry in feed.entries[:10]:  # 每个源取前10条
-            article = {
-                "title": entry.get("title", ""),
-                "summary": entry.get("summary", entry.get("description", ""))[:300],
-                "link": entry.get("link", ""),
-                "published": entry.get("published", ""),
-                "source": "rss",
-                "feed_url": url,
-            }
-            articles.append(article)
-        
-        return articles
+        resp = http_client.get(url, headers=headers, timeout=timeout, retries=RSS_CONFIG["retry"], stage="fetch")
+
+        # 304: 源未更新，直接复用上次解析结果
+        if resp.status_code == 304:
+            return cached.get("articles", []), cached, "not_modified"
+
+        resp.raise_for_status()
+        body = resp.content
+        entry = {
+            "etag": resp.headers.get("ETag", ""),
+            "last_modified": resp.headers.get("Last-Modified", ""),
+            "body_hash": hashlib.sha256(body).hexdigest(),
+        }
+
+        # 服务器不支持校验头时，按内容哈希判断是否需要重新解析
+        if entry["body_hash"] == cached.get("body_hash") and "articles" in cached:
+            entry["articles"] = cached["articles"]
+            return entry["articles"], entry, "unchanged"
+
+        with metrics.timer("rss_parse_seconds"):
+            entry["articles"] = parse_entries(feedparser.parse(body), url)
+        return entry["articles"], entry, "fetched"
     except Exception as e:
         print(f"Error fetching RSS {url}: {e}")
-        return []
+        return cached.get("articles", []), cached, "error"
 
 
-def main():
-    """主函数"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    
+@metrics.stage("fetch_rss")
+def collect_articles() -> list:
+    """并发抓取所有 RSS 源，返回去重后的文章列表"""
+    cache = load_cache()
     all_articles = []
-    for feed_url in RSS_FEEDS:
-        print(f"Fetching RSS: {feed_url}")
-        articles = fetch_rss_feed(feed_url)
-        all_articles.extend(articles)
-        print(f"  Got {len(articles)} articles")
-    
+
+    with ThreadPoolExecutor(max_workers=RSS_CONFIG["concurrency"]) as pool:
+        jobs = [
+            (feed_url, pool.submit(fetch_rss_feed, feed_url, cache.get(feed_url)))
+            for feed_url in RSS_FEEDS
+        ]
+        for feed_url, job in jobs:
+            articles, entry, status = job.result()
+            if entry:
+                cache[feed_url] = entry
+            all_articles.extend(articles)
+            metrics.inc("rss_feed_status_total", status=status)
+            print(f"RSS {feed_url}: {status}, {len(articles)} articles")
+
+    # 清理已从配置中移除的源
+    cache = {url: entry for url, entry in cache.items() if url in RSS_FEEDS}
+    save_cache(cache)
+
     # 去重
     seen_links = set()
     unique_articles = []
@@ -52,16 +132,26 @@ def main():
         if a["link"] not in seen_links:
             seen_links.add(a["link"])
             unique_articles.append(a)
-    
-    # 保存
-    output_file = os.path.join(DATA_DIR, "rss_data.json")
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(unique_articles, f, ensure_ascii=False, indent=2)
-    
-    print(f"\nTotal unique articles: {len(unique_articles)}")
-    print(f"Saved to: {output_file}")
+
+    metrics.inc("items_fetched_total", len(unique_articles), source="rss")
+    return unique_articles
+
+
+def main():
+    """主函数"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+
+    unique_articles = collect_articles()
+
+    # 写入条目库，跨运行去重
+    store = ItemStore()
+    new_articles = store.add_items(unique_articles)
+    store.close()
+
+    print(f"\nTotal unique articles: {len(unique_articles)} ({len(new_articles)} new)")
     return unique_articles
 
 
 if __name__ == "__main__":
     main()
+    metrics.write_report("fetch_rss")
@@ -0,0 +1,68 @@
+"""增量抓取状态 - 记录每个账号/查询已见到的最新推文"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import DATA_DIR
+
+STATE_FILE = os.path.join(DATA_DIR, "fetch_state.json")
+
+
+def load_state() -> dict:
+    """加载状态: {查询键: {"since_id": str, "since_time": str}}"""
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable fetch state: {e}")
+    return {}
+
+
+def save_state(state: dict):
+    """保存状态"""
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2)
+
+
+def parse_tweet_time(created_at: str):
+    """解析 twitterapi.io 的时间格式，如 "Tue Dec 10 07:00:30 +0000 2024" """
+    try:
+        return datetime.strptime(created_at, "%a %b %d %H:%M:%S %z %Y")
+    except (TypeError, ValueError):
+        return None
+
+
+def tweet_id_value(tweet_id) -> int:
+    """推文 ID 按数值比较，无法解析时视为 0"""
+    try:
+        return int(tweet_id)
+    except (TypeError, ValueError):
+        return 0
+
+
+def since_operator(mark: dict) -> str:
+    """根据高水位生成查询运算符，优先使用 since_id"""
+    if not mark:
+        return ""
+    if mark.get("since_id"):
+        return f"since_id:{mark['since_id']}"
+    if mark.get("since_time"):
+        t = datetime.fromisoformat(mark["since_time"]).astimezone(timezone.utc)
+        return f"since:{t.strftime('%Y-%m-%d_%H:%M:%S')}_UTC"
+    return ""
+
+
+def advance_mark(mark: dict, tweets: list) -> dict:
+    """用本次抓到的推文推进高水位，返回新的标记"""
+    mark = dict(mark or {})
+    newest = max(tweets, key=lambda t: tweet_id_value(t.get("id")), default=None)
+    if newest and tweet_id_value(newest.get("id")) > tweet_id_value(mark.get("since_id")):
+        mark["since_id"] = str(newest["id"])
+        created = parse_tweet_time(newest.get("created_at"))
+        if created:
+            mark["since_time"] = created.isoformat()
+    return mark
@@ -1,38 +1,54 @@
 """从 X/Twitter 获取加密货币合规相关推文"""
-import json
 import os
 import sys
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-
-import requests
+from urllib.parse import urlparse
 
 sys.path.insert(0, str(Path(__file__).parent))
-from config import DATA_DIR, X_API_CONFIG
+import deadline
+import http_client
+import metrics
+import scheduler
+from accounts import get_registry
+from config import DATA_DIR, RUN_CONFIG, X_API_CONFIG
+from fetch_state import advance_mark, load_state, save_state, since_operator, tweet_id_value
+from item_store import ItemStore
+from query_planner import plan_account_queries
+
+# 账号查询附加的关键词过滤
+ACCOUNT_KEYWORDS = "(crypto OR regulation OR compliance OR SEC OR stablecoin)"
+
+# 账号优先级的排序，临近时限时从低到高放弃
+ACCOUNT_PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+# 按 twitterapi.io 配额限速并限制单次运行的请求总数，所有线程共享
+http_client.set_host_rate_limit(
+    urlparse(X_API_CONFIG["api_base"]).netloc,
+    X_API_CONFIG["rate_limit"],
+    X_API_CONFIG["rate_burst"],
+)
+http_client.set_request_budget(urlparse(X_API_CONFIG["api_base"]).netloc, X_API_CONFIG["request_budget"])
 
 
 def load_accounts():
-    """从配置文件加载监控账号"""
-    config_file = os.path.join(os.path.dirname(__file__), "..", "config", "accounts.json")
-    if os.path.exists(config_file):
-        with open(config_file, "r", encoding="utf-8") as f:
-            config = json.load(f)
-            # 只返回启用的账号
-            return [a for a in config.get("accounts", []) if a.get("enabled", True)]
-    return []
-
-
-def fetch_tweets_by_account(username: str, max_pages: int = 2) -> list:
-    """从 twitterapi.io 获取指定账号的推文"""
+    """从账号注册表加载启用的监控账号"""
+    return get_registry().enabled()
+
+
+def search_tweets(query: str, max_pages: int = 2, since_id: str = None) -> tuple:
+    """分页调用 advanced_search，返回 (原始推文列表, 是否完整抓取)
+
+    给定 since_id 时，遇到不比它新的推文即停止翻页；翻满 max_pages 仍有下一页、
+    或抓取阶段到时限时停止并视为未完整抓取（高水位的处理见 next_mark）。
+    """
     headers = {"X-API-Key": X_API_CONFIG["api_key"]}
+    host = urlparse(X_API_CONFIG["api_base"]).netloc
+    floor = tweet_id_value(since_id)
     
-    all_tweets = []
+    raw_tweets = []
     cursor = None
     
-    # 构建查询：来自特定账号，且包含关键词
-    keywords = "(crypto OR regulation OR compliance OR SEC OR stablecoin)"
-    query = f"from:{username} {keywords}"
-    
     for page in range(max_pages):
         params = {
             "query": query,
@@ -41,109 +57,173 @@ def fetch_tweets_by_account(username: str, max_pages: int = 2) -> list:
         if cursor:
             params["cursor"] = cursor
         
+        timeout = deadline.adaptive_timeout(
+            "http_request_seconds", X_API_CONFIG["timeout"], RUN_CONFIG["http_min_timeout"], stage="fetch", host=host
+        )
+        if timeout <= 0:
+            metrics.inc("work_shed_total", kind="x_query")
+            print(f"Fetch deadline reached, skipping '{query}'")
+            return raw_tweets, False
+        
         try:
-            resp = requests.get(
+            resp = http_client.get(
                 f"{X_API_CONFIG['api_base']}{X_API_CONFIG['endpoint']}",
                 headers=headers,
                 params=params,
-                timeout=X_API_CONFIG["timeout"]
+                timeout=timeout,
+                retries=X_API_CONFIG["retry"],
+                stage="fetch",
             )
             resp.raise_for_status()
             data = resp.json()
             
             tweets = data.get("tweets", [])
-            for t in tweets:
-                all_tweets.append({
-                    "id": t.get("id"),
-                    "text": t.get("text", ""),
-                    "created_at": t.get("createdAt"),
-                    "author": t.get("author", {}).get("userName", ""),
-                    "url": f"https://x.com/{t.get('author', {}).get('userName', '')}/status/{t.get('id')}",
-                    "source": "x",
-                    "query": f"from:{username}",
-                    "account_category": next((a.get("category", "") for a in load_accounts() if a["username"].lower() == username.lower()), ""),
-                })
+            fresh = [t for t in tweets if tweet_id_value(t.get("id")) > floor]
+            raw_tweets.extend(fresh)
+            
+            # 已经翻到旧内容，无需继续
+            if len(fresh) < len(tweets):
+                break
             
             cursor = data.get("next_cursor")
             if not cursor:
                 break
                 
         except Exception as e:
-            print(f"Error fetching tweets for @{username}: {e}")
-            break
+            print(f"Error fetching tweets for '{query}': {e}")
+            return raw_tweets, False
+    else:
+        # 翻满 max_pages 仍有下一页：比这些页更早的新推文没有取到
+        metrics.inc("x_pages_truncated_total")
+        print(f"Query '{query}' has more than {max_pages} pages of new tweets")
+        return raw_tweets, False
     
-    return all_tweets
+    return raw_tweets, True
 
 
-def fetch_tweets_by_keyword(query: str, max_pages: int = 2) -> list:
-    """从 twitterapi.io 按关键词搜索推文"""
-    headers = {"X-API-Key": X_API_CONFIG["api_key"]}
+def to_item(t: dict, query: str, account_category: str = "") -> dict:
+    """将 API 返回的推文转换为统一格式"""
+    return {
+        "id": t.get("id"),
+        "text": t.get("text", ""),
+        "created_at": t.get("createdAt"),
+        "author": t.get("author", {}).get("userName", ""),
+        "url": f"https://x.com/{t.get('author', {}).get('userName', '')}/status/{t.get('id')}",
+        "source": "x",
+        "query": query,
+        "account_category": account_category,
+    }
+
+
+def fetch_tweets_by_account(username: str, max_pages: int = 2, mark: dict = None) -> tuple:
+    """从 twitterapi.io 获取指定账号的推文，返回 (推文列表, 是否完整抓取)"""
+    # 构建查询：来自特定账号，且包含关键词
+    query = f"from:{username} {ACCOUNT_KEYWORDS} {since_operator(mark)}".strip()
     
-    all_tweets = []
-    cursor = None
+    raw_tweets, complete = search_tweets(query, max_pages, (mark or {}).get("since_id"))
+    category = get_registry().category_of(username)
+    return [to_item(t, f"from:{username}", category) for t in raw_tweets], complete
+
+
+def fetch_tweets_by_group(group, state: dict, max_pages: int = 2) -> tuple:
+    """执行一条合并账号查询，按作者把推文分回各账号
+
+    返回 ({小写用户名: 推文列表}, {小写用户名: 是否完整抓取}, 是否取到过结果)；每个账号只保留比它
+    自己的高水位更新的推文。整条查询未完整抓取时，已翻过自己高水位的账号仍算完整。
+    """
+    registry = get_registry()
+    raw_tweets, complete = search_tweets(group.query, max_pages, group.mark.get("since_id"))
+    oldest = min((tweet_id_value(t.get("id")) for t in raw_tweets), default=None)
     
-    for page in range(max_pages):
-        params = {
-            "query": query,
-            "queryType": X_API_CONFIG["query_type"],
-        }
-        if cursor:
-            params["cursor"] = cursor
-        
-        try:
-            resp = requests.get(
-                f"{X_API_CONFIG['api_base']}{X_API_CONFIG['endpoint']}",
-                headers=headers,
-                params=params,
-                timeout=X_API_CONFIG["timeout"]
-            )
-            resp.raise_for_status()
-            data = resp.json()
-            
-            tweets = data.get("tweets", [])
-            for t in tweets:
-                all_tweets.append({
-                    "id": t.get("id"),
-                    "text": t.get("text", ""),
-                    "created_at": t.get("createdAt"),
-                    "author": t.get("author", {}).get("userName", ""),
-                    "url": f"https://x.com/{t.get('author', {}).get('userName', '')}/status/{t.get('id')}",
-                    "source": "x",
-                    "query": query,
-                    "account_category": "",
-                })
-            
-            cursor = data.get("next_cursor")
-            if not cursor:
-                break
-                
-        except Exception as e:
-            print(f"Error fetching tweets for '{query}': {e}")
+    routed = {u.lower(): [] for u in group.usernames}
+    covered = {}
+    for username in group.usernames:
+        floor = tweet_id_value((state.get(f"from:{username.lower()}") or {}).get("since_id"))
+        covered[username.lower()] = complete or (floor > 0 and oldest is not None and oldest <= floor)
+    for t in raw_tweets:
+        account = registry.get(t.get("author", {}).get("userName", ""))
+        if not account or account["username"].lower() not in routed:
+            continue
+        username = account["username"]
+        floor = tweet_id_value((state.get(f"from:{username.lower()}") or {}).get("since_id"))
+        if tweet_id_value(t.get("id")) > floor:
+            routed[username.lower()].append(to_item(t, f"from:{username}", account["category"]))
+    # 未完整抓取且没有任何推文：第一页就出错或到了时限，查询没有真正执行
+    return routed, covered, complete or bool(raw_tweets)
+
+
+def fetch_tweets_by_keyword(query: str, max_pages: int = 2, mark: dict = None) -> tuple:
+    """从 twitterapi.io 按关键词搜索推文，返回 (推文列表, 是否完整抓取)"""
+    full_query = f"{query} {since_operator(mark)}".strip()
+    raw_tweets, complete = search_tweets(full_query, max_pages, (mark or {}).get("since_id"))
+    return [to_item(t, query) for t in raw_tweets], complete
+
+
+def next_mark(mark: dict, tweets: list, complete: bool) -> dict:
+    """本次查询后的高水位
+
+    完整抓取时推进到最新推文。未完整抓取时，已有高水位的保持不变，下次从原位置重新补齐；
+    还没有高水位的（首次抓取）直接以本次最新推文建立，更早的历史不再回溯。
+    """
+    if complete or not (mark or {}).get("since_id"):
+        return advance_mark(mark, tweets)
+    return mark
+
+
+def group_rank(group) -> int:
+    """合并查询的优先级：组内最高的账号优先级"""
+    registry = get_registry()
+    return min(ACCOUNT_PRIORITY_ORDER.get((registry.get(u) or {}).get("priority"), 3) for u in group.usernames)
+
+
+def shed_queries(groups: list, keyword_queries: list) -> tuple:
+    """按已知的请求延迟预估抓取耗时，超出阶段剩余时间时依次放弃关键词搜索、低优先级和中优先级账号的查询
+
+    没有延迟数据时不预先放弃，由 search_tweets 在到达时限时停止。
+    """
+    latency = deadline.p95("http_request_seconds", host=urlparse(X_API_CONFIG["api_base"]).netloc)
+    if latency is None:
+        return groups, keyword_queries
+    remaining = deadline.stage_remaining("fetch")
+
+    def estimate(n_groups, n_keywords):
+        requests = n_groups * X_API_CONFIG["max_pages"] + n_keywords
+        limited = requests / X_API_CONFIG["rate_limit"] if X_API_CONFIG["rate_limit"] else 0
+        return max(requests * latency / X_API_CONFIG["concurrency"], limited)
+
+    if estimate(len(groups), len(keyword_queries)) <= remaining:
+        return groups, keyword_queries
+    metrics.inc("work_shed_total", len(keyword_queries), kind="keyword_search")
+    print(f"Fetch budget tight ({remaining:.0f}s left), skipping {len(keyword_queries)} keyword searches")
+    keyword_queries = []
+    for priority in ("low", "medium"):
+        if estimate(len(groups), 0) <= remaining:
             break
-    
-    return all_tweets
+        rank = ACCOUNT_PRIORITY_ORDER[priority]
+        kept = [g for g in groups if group_rank(g) != rank]
+        if len(kept) == len(groups):
+            continue
+        metrics.inc("work_shed_total", len(groups) - len(kept), kind=f"{priority}_accounts")
+        print(f"Skipping {len(groups) - len(kept)} queries for {priority}-priority accounts")
+        groups = kept
+    return groups, keyword_queries
 
 
-def main():
-    """主函数"""
-    os.makedirs(DATA_DIR, exist_ok=True)
-    
+@metrics.stage("fetch_x")
+def collect_tweets() -> list:
+    """抓取所有账号和关键词的新推文，返回去重后的列表"""
     all_tweets = []
     
     # 1. 从配置的账号获取推文
     accounts = load_accounts()
     print(f"Loaded {len(accounts)} accounts from config")
     
-    # 优先获取 high priority 账号
-    high_priority = [a for a in accounts if a.get("priority") == "high"][:10]
-    medium_priority = [a for a in accounts if a.get("priority") == "medium"][:5]
-    
-    for account in high_priority + medium_priority:
-        username = account["username"]
-        print(f"Fetching tweets from @{username} ({account.get('category', '')})")
-        tweets = fetch_tweets_by_account(username, max_pages=1)
-        all_tweets.extend(tweets)
-        print(f"  Got {len(tweets)} tweets")
+    # 按历史发帖频率和 P1/P2 占比选出本次要轮询的账号
+    schedule = scheduler.load_state()
+    accounts = scheduler.select_accounts(accounts, schedule, ACCOUNT_KEYWORDS)
+    print(f"Scheduled {len(accounts)} accounts for this run")
+    # 高优先级账号排在前面，合并查询按优先级分组并先提交，到时限时被放弃的是低价值查询
+    accounts.sort(key=lambda a: ACCOUNT_PRIORITY_ORDER.get(a.get("priority"), 3))
     
     # 2. 按关键词搜索补充
     keyword_queries = [
@@ -152,11 +232,49 @@ def main():
         "stablecoin compliance"
     ]
     
-    for query in keyword_queries[:2]:
-        print(f"Fetching tweets for keyword: {query}")
-        tweets = fetch_tweets_by_keyword(query, max_pages=1)
-        all_tweets.extend(tweets)
-        print(f"  Got {len(tweets)} tweets")
+    # 每个账号/查询的高水位，只抓取上次之后的新推文
+    state = load_state()
+    
+    # 多个账号合并为一条 OR 查询，按查询长度上限分组
+    groups = plan_account_queries(accounts, ACCOUNT_KEYWORDS, state)
+    print(f"Planned {len(groups)} queries for {len(accounts)} accounts")
+    groups, keyword_queries = shed_queries(groups, keyword_queries)
+    
+    with ThreadPoolExecutor(max_workers=X_API_CONFIG["concurrency"]) as pool:
+        group_jobs = [
+            (group, pool.submit(fetch_tweets_by_group, group, state, X_API_CONFIG["max_pages"]))
+            for group in groups
+        ]
+        keyword_jobs = [
+            (query, query, pool.submit(fetch_tweets_by_keyword, query, 1, state.get(query)))
+            for query in keyword_queries
+        ]
+        
+        # 按提交顺序收集结果，保证输出顺序稳定
+        polled, partial = {}, set()
+        for group, job in group_jobs:
+            routed, covered, queried = job.result()
+            if queried:
+                polled.update(routed)
+                partial.update(u for u in routed if not covered[u])
+            # 账号的高水位按整条查询的最新推文推进：比它更早的该账号推文都已取到，
+            # 本次没有发帖的账号也有了高水位，合并查询才能带上 since_id
+            group_tweets = [t for tweets in routed.values() for t in tweets]
+            for username in group.usernames:
+                key = f"from:{username.lower()}"
+                all_tweets.extend(routed[username.lower()])
+                state[key] = next_mark(state.get(key), group_tweets, covered[username.lower()])
+            print(f"Query for {len(group.usernames)} accounts: got {sum(len(v) for v in routed.values())} new tweets")
+        
+        for key, query, job in keyword_jobs:
+            tweets, complete = job.result()
+            all_tweets.extend(tweets)
+            state[key] = next_mark(state.get(key), tweets, complete)
+            print(f"Keyword '{query}': got {len(tweets)} new tweets")
+    
+    save_state(state)
+    scheduler.update_stats(schedule, polled, partial)
+    scheduler.save_state(schedule)
     
     # 去重
     seen_ids = set()
@@ -166,15 +284,25 @@ def main():
             seen_ids.add(t["id"])
             unique_tweets.append(t)
     
-    # 保存
-    output_file = os.path.join(DATA_DIR, "x_data.json")
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(unique_tweets, f, ensure_ascii=False, indent=2)
+    metrics.inc("items_fetched_total", len(unique_tweets), source="x")
+    return unique_tweets
+
+
+def main():
+    """主函数"""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    
+    unique_tweets = collect_tweets()
+    
+    # 写入条目库，跨运行去重
+    store = ItemStore()
+    new_tweets = store.add_items(unique_tweets)
+    store.close()
     
-    print(f"\nTotal unique tweets: {len(unique_tweets)}")
-    print(f"Saved to: {output_file}")
+    print(f"\nTotal unique tweets: {len(unique_tweets)} ({len(new_tweets)} new)")
     return unique_tweets
 
 
 if __name__ == "__main__":
     main()
+    metrics.write_report("fetch_x")
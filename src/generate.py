@@ -1,38 +1,59 @@
 """生成 HTML 报告 - 简化可靠版本"""
+import hashlib
 import json
 import os
-import shutil
-from datetime import datetime
+import re
+import sys
 from pathlib import Path
 
-# 配置
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-OUTPUT_DIR = os.path.join(BASE_DIR, "docs")
+sys.path.insert(0, str(Path(__file__).parent))
+from classifier import classify
+from dedupe import cluster_items, cluster_sources, pick_representative
+import metrics
+from config import DATA_DIR, MAX_HISTORY, OUTPUT_DIR
+from item_store import ItemStore, item_uid, utc_now
+from render import copy_if_changed, render_to_file, template_version
 
-os.makedirs(DATA_DIR, exist_ok=True)
-os.makedirs(OUTPUT_DIR, exist_ok=True)
+# 增量构建清单：记录每份报告的输入摘要
+MANIFEST_FILE = os.path.join(DATA_DIR, "build_manifest.json")
+REPORT_RE = re.compile(r"^report-(\d{4}-\d{2}-\d{2})\.html$")
 
 
-def generate_simple_report():
-    """生成简化报告"""
-    
-    # 加载数据
-    x_data = []
-    rss_data = []
-    
-    x_file = os.path.join(DATA_DIR, "x_data.json")
-    rss_file = os.path.join(DATA_DIR, "rss_data.json")
-    
-    if os.path.exists(x_file):
-        with open(x_file, "r", encoding="utf-8") as f:
-            x_data = json.load(f)
-    
-    if os.path.exists(rss_file):
-        with open(rss_file, "r", encoding="utf-8") as f:
-            rss_data = json.load(f)
+def load_manifest() -> dict:
+    """加载构建清单"""
+    if os.path.exists(MANIFEST_FILE):
+        try:
+            with open(MANIFEST_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable build manifest: {e}")
+    return {"reports": {}}
+
+
+def save_manifest(manifest: dict):
+    """保存构建清单"""
+    with open(MANIFEST_FILE, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def items_digest(items: list) -> str:
+    """报告输入摘要：条目内容 + 模板版本，任一变化都需要重新渲染"""
+    h = hashlib.sha256(template_version().encode("utf-8"))
+    for item in sorted(items, key=item_uid):
+        h.update(json.dumps(item, ensure_ascii=False, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()
+
+
+def build_sections(items: list, day: str) -> list:
+    """把一天的条目聚类、分级，返回报告的 P1/P2/P3 分区"""
+    # 近似重复聚类，同一事件只展示一次并列出全部来源
+    stories = [
+        {**pick_representative(cluster), "sources": cluster_sources(cluster)}
+        for cluster in cluster_items(items)
+    ]
     
-    print(f"Loaded {len(x_data)} tweets, {len(rss_data)} articles")
+    x_data = [item for item in stories if item.get("source") == "x"]
+    rss_data = [item for item in stories if item.get("source") != "x"]
     
     # 简单的优先级分类
     p1_items = []
@@ -44,22 +65,17 @@ def generate_simple_report():
         text = item.get("text", "")
         author = item.get("author", "")
         
-        # 简单分类
-        text_lower = text.lower()
-        if any(k in text_lower for k in ["sec", "enforcement", "charges", "lawsuit", "ban", "crackdown", "执法", "禁令"]):
-            priority = "P1"
-        elif any(k in text_lower for k in ["regulation", "compliance", "guidance", "framework", "监管", "合规"]):
-            priority = "P2"
-        else:
-            priority = "P3"
+        # 已分析的条目直接使用分析结果，否则用关键词分类器
+        priority = item.get("priority") or classify(text)[0]
         
         entry = {
             "title": text[:60] + "..." if len(text) > 60 else text,
             "summary": text,
             "author": author,
             "url": item.get("url", "#"),
-            "time": item.get("created_at", "")[:10] if item.get("created_at") else datetime.now().strftime("%Y-%m-%d"),
+            "time": item.get("created_at", "")[:10] if item.get("created_at") else day,
             "category": item.get("account_category", "未知"),
+            "sources": item["sources"],
         }
         
         if priority == "P1":
@@ -74,21 +90,16 @@ def generate_simple_report():
         title = item.get("title", "")
         summary = item.get("summary", "")
         
-        title_lower = title.lower()
-        if any(k in title_lower for k in ["sec", "enforcement", "charges", "lawsuit", "ban", "crackdown"]):
-            priority = "P1"
-        elif any(k in title_lower for k in ["regulation", "compliance", "guidance", "framework"]):
-            priority = "P2"
-        else:
-            priority = "P3"
+        priority = item.get("priority") or classify(title)[0]
         
         entry = {
             "title": title[:60] + "..." if len(title) > 60 else title,
             "summary": summary[:200] + "..." if len(summary) > 200 else summary,
             "author": item.get("source", "RSS"),
             "url": item.get("link", "#"),
-            "time": item.get("published", "")[:10] if item.get("published") else datetime.now().strftime("%Y-%m-%d"),
+            "time": item.get("published", "")[:10] if item.get("published") else day,
             "category": "新闻",
+            "sources": item["sources"],
         }
         
         if priority == "P1":
@@ -98,190 +109,88 @@ def generate_simple_report():
         else:
             p3_items.append(entry)
     
-    today = datetime.now().strftime("%Y-%m-%d")
-    
-    # 生成 HTML
-    html = f'''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>加密货币合规情报 - {today}</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{ font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif; background: #f5f5f5; line-height: 1.6; }}
-        .container {{ max-width: 900px; margin: 0 auto; padding: 20px; }}
-        header {{ background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 30px; border-radius: 12px; margin-bottom: 20px; }}
-        header h1 {{ font-size: 24px; margin-bottom: 8px; }}
-        header .meta {{ opacity: 0.9; font-size: 14px; }}
-        .stats {{ display: grid; grid-template-columns: repeat(3, 1fr); gap: 12px; margin-bottom: 20px; }}
-        .stat-card {{ background: white; padding: 16px; border-radius: 8px; text-align: center; box-shadow: 0 2px 4px rgba(0,0,0,0.1); }}
-        .stat-card.p1 {{ border-top: 3px solid #e74c3c; }}
-        .stat-card.p2 {{ border-top: 3px solid #f39c12; }}
-        .stat-card.p3 {{ border-top: 3px solid #3498db; }}
-        .stat-card .count {{ font-size: 28px; font-weight: bold; color: #333; }}
-        .stat-card .label {{ font-size: 12px; color: #666; margin-top: 4px; }}
-        .section {{ background: white; border-radius: 12px; padding: 20px; margin-bottom: 16px; box-shadow: 0 2px 8px rgba(0,0,0,0.08); }}
-        .section h2 {{ font-size: 18px; margin-bottom: 16px; padding-bottom: 10px; border-bottom: 2px solid #eee; }}
-        .section.p1 h2 {{ color: #e74c3c; border-color: #e74c3c; }}
-        .section.p2 h2 {{ color: #f39c12; border-color: #f39c12; }}
-        .section.p3 h2 {{ color: #3498db; border-color: #3498db; }}
-        .item {{ padding: 14px 0; border-bottom: 1px solid #f0f0f0; }}
-        .item:last-child {{ border-bottom: none; }}
-        .item-header {{ display: flex; align-items: center; gap: 8px; margin-bottom: 6px; }}
-        .item-title {{ font-weight: 600; color: #333; font-size: 15px; flex: 1; }}
-        .item-category {{ font-size: 11px; padding: 2px 8px; border-radius: 4px; background: #e3f2fd; color: #1565c0; }}
-        .item-summary {{ color: #666; font-size: 14px; margin-bottom: 8px; line-height: 1.5; }}
-        .item-meta {{ display: flex; gap: 12px; font-size: 12px; color: #999; align-items: center; }}
-        .item-meta a {{ color: #667eea; text-decoration: none; }}
-        .item-meta a:hover {{ text-decoration: underline; }}
-        .badge {{ display: inline-block; padding: 2px 8px; border-radius: 4px; font-size: 11px; font-weight: 600; }}
-        .badge-p1 {{ background: #fee; color: #c33; }}
-        .badge-p2 {{ background: #fff3e0; color: #e65100; }}
-        .badge-p3 {{ background: #e3f2fd; color: #1565c0; }}
-        .empty {{ text-align: center; padding: 40px; color: #999; }}
-        footer {{ text-align: center; padding: 30px; color: #999; font-size: 12px; }}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <header>
-            <h1>🛡️ 加密货币合规情报监控</h1>
-            <div class="meta">生成时间: {today} | 数据来源: X/Twitter + RSS</div>
-        </header>
+    return [
+        {"level": "p1", "label": "P1 紧急", "heading": "🔴 P1 紧急 - 监管执法/重大政策",
+         "total": len(p1_items), "items": p1_items[:15]},
+        {"level": "p2", "label": "P2 重要", "heading": "🟡 P2 重要 - 合规指南/行业动态",
+         "total": len(p2_items), "items": p2_items[:15]},
+        {"level": "p3", "label": "P3 一般", "heading": "🔵 P3 一般 - 行业新闻/研究报告",
+         "total": len(p3_items), "items": p3_items[:10]},
+    ]
+
+
+@metrics.stage("generate")
+def generate_simple_report():
+    """增量生成每日报告、归档页和 index.html"""
+    store = ItemStore()
+    last_report = store.get_meta("last_report_at")
+    new_count = len(store.fetched_since(last_report))
+    
+    # 条目按抓取日期分组，每天一份报告，只保留最近 MAX_HISTORY 天
+    days = store.fetched_by_day()
+    kept_days = sorted(days, reverse=True)[:MAX_HISTORY]
+    print(f"Loaded {sum(len(v) for v in days.values())} items over {len(days)} days ({new_count} new since last report)")
+    
+    manifest = load_manifest()
+    reports = {}
+    rendered = 0
+    written = 0
+    
+    for day in kept_days:
+        report_file = os.path.join(OUTPUT_DIR, f"report-{day}.html")
+        digest = items_digest(days[day])
+        previous = manifest["reports"].get(day, {})
         
-        <div class="stats">
-            <div class="stat-card p1">
-                <div class="count">{len(p1_items)}</div>
-                <div class="label">P1 紧急</div>
-            </div>
-            <div class="stat-card p2">
-                <div class="count">{len(p2_items)}</div>
-                <div class="label">P2 重要</div>
-            </div>
-            <div class="stat-card p3">
-                <div class="count">{len(p3_items)}</div>
-                <div class="label">P3 一般</div>
-            </div>
-        </div>
-'''
-    
-    # P1 部分
-    if p1_items:
-        html += '''
-        <div class="section p1">
-            <h2>🔴 P1 紧急 - 监管执法/重大政策</h2>
-'''
-        for item in p1_items[:15]:
-            html += f'''
-            <div class="item">
-                <div class="item-header">
-                    <span class="badge badge-p1">P1</span>
-                    <span class="item-title">{item["title"]}</span>
-                    <span class="item-category">{item["category"]}</span>
-                </div>
-                <div class="item-summary">{item["summary"]}</div>
-                <div class="item-meta">
-                    <span>@{item["author"]}</span>
-                    <span>{item["time"]}</span>
-                    <a href="{item["url"]}" target="_blank">查看原文 →</a>
-                </div>
-            </div>
-'''
-        html += '        </div>\n'
-    else:
-        html += '''
-        <div class="section p1">
-            <h2>🔴 P1 紧急 - 监管执法/重大政策</h2>
-            <div class="empty">今日暂无 P1 级别情报</div>
-        </div>
-'''
-    
-    # P2 部分
-    if p2_items:
-        html += '''
-        <div class="section p2">
-            <h2>🟡 P2 重要 - 合规指南/行业动态</h2>
-'''
-        for item in p2_items[:15]:
-            html += f'''
-            <div class="item">
-                <div class="item-header">
-                    <span class="badge badge-p2">P2</span>
-                    <span class="item-title">{item["title"]}</span>
-                    <span class="item-category">{item["category"]}</span>
-                </div>
-                <div class="item-summary">{item["summary"]}</div>
-                <div class="item-meta">
-                    <span>@{item["author"]}</span>
-                    <span>{item["time"]}</span>
-                    <a href="{item["url"]}" target="_blank">查看原文 →</a>
-                </div>
-            </div>
-'''
-        html += '        </div>\n'
-    else:
-        html += '''
-        <div class="section p2">
-            <h2>🟡 P2 重要 - 合规指南/行业动态</h2>
-            <div class="empty">今日暂无 P2 级别情报</div>
-        </div>
-'''
-    
-    # P3 部分
-    if p3_items:
-        html += '''
-        <div class="section p3">
-            <h2>🔵 P3 一般 - 行业新闻/研究报告</h2>
-'''
-        for item in p3_items[:10]:
-            html += f'''
-            <div class="item">
-                <div class="item-header">
-                    <span class="badge badge-p3">P3</span>
-                    <span class="item-title">{item["title"]}</span>
-                    <span class="item-category">{item["category"]}</span>
-                </div>
-                <div class="item-summary">{item["summary"]}</div>
-                <div class="item-meta">
-                    <span>@{item["author"]}</span>
-                    <span>{item["time"]}</span>
-                    <a href="{item["url"]}" target="_blank">查看原文 →</a>
-                </div>
-            </div>
-'''
-        html += '        </div>\n'
-    else:
-        html += '''
-        <div class="section p3">
-            <h2>🔵 P3 一般 - 行业新闻/研究报告</h2>
-            <div class="empty">今日暂无 P3 级别情报</div>
-        </div>
-'''
+        # 输入未变化且文件仍在，跳过渲染
+        if previous.get("digest") == digest and os.path.exists(report_file):
+            reports[day] = previous
+            continue
+        
+        sections = build_sections(days[day], day)
+        # 保存报告（模板流式渲染，条目内容自动转义；字节不变时不覆盖）
+        written += render_to_file("report.html", report_file, today=day, item_count=len(days[day]), sections=sections)
+        rendered += 1
+        reports[day] = {
+            "digest": digest,
+            "items": len(days[day]),
+            "counts": {s["level"]: s["total"] for s in sections},
+        }
     
-    html += '''
-        <footer>
-            <p>自动生成的加密货币合规情报监控报告</p>
-            <p>数据来源: X/Twitter API + RSS 新闻源</p>
-        </footer>
-    </div>
-</body>
-</html>
-'''
+    # 删除超出保留期的报告文件
+    for name in os.listdir(OUTPUT_DIR):
+        m = REPORT_RE.match(name)
+        if m and m.group(1) not in reports:
+            os.remove(os.path.join(OUTPUT_DIR, name))
+            print(f"Removed expired report: {name}")
     
-    # 保存报告
-    report_file = os.path.join(OUTPUT_DIR, f"report-{today}.html")
-    with open(report_file, "w", encoding="utf-8") as f:
-        f.write(html)
+    # 归档页
+    archive = [{"day": day, "file": f"report-{day}.html", **reports[day]} for day in kept_days]
+    written += render_to_file("archive.html", os.path.join(OUTPUT_DIR, "archive.html"), reports=archive)
     
-    # 更新 index.html
+    # index.html 与最新一份报告相同
     index_file = os.path.join(OUTPUT_DIR, "index.html")
-    with open(index_file, "w", encoding="utf-8") as f:
-        f.write(html)
-    
-    print(f"Report generated: {report_file}")
-    print(f"Total items: P1={len(p1_items)}, P2={len(p2_items)}, P3={len(p3_items)}")
+    if kept_days:
+        written += copy_if_changed(os.path.join(OUTPUT_DIR, f"report-{kept_days[0]}.html"), index_file)
+    
+    manifest["reports"] = reports
+    save_manifest(manifest)
+    
+    # 记录报告时间，并按保留期清理旧条目
+    store.set_meta("last_report_at", utc_now())
+    removed = store.prune()
+    store.close()
+    
+    metrics.inc("reports_rendered_total", rendered)
+    metrics.inc("reports_skipped_total", len(kept_days) - rendered)
+    metrics.inc("files_written_total", written)
+    print(f"Reports: {len(kept_days)} kept, {rendered} re-rendered, {written} files written")
+    if removed:
+        print(f"Pruned {removed} items older than retention")
+    if kept_days:
+        counts = reports[kept_days[0]]["counts"]
+        print(f"Latest {kept_days[0]}: P1={counts['p1']}, P2={counts['p2']}, P3={counts['p3']}")
 
 
 if __name__ == "__main__":
     generate_simple_report()
+    metrics.write_report("generate")
@@ -0,0 +1,246 @@
+"""共享 HTTP 客户端 - 连接池复用、按主机限速、重试退避、熔断与请求预算"""
+import random
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+sys.path.insert(0, str(Path(__file__).parent))
+import deadline
+import metrics
+from config import HTTP_CONFIG
+
+# 可重试的状态码：限流和服务端错误
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+_limiters = {}
+_limiters_lock = threading.Lock()
+_breakers = {}
+_breakers_lock = threading.Lock()
+_budgets = {}
+_budgets_lock = threading.Lock()
+
+
+class CircuitOpenError(requests.RequestException):
+    """接口处于熔断状态，请求未发出"""
+
+
+class BudgetExhaustedError(requests.RequestException):
+    """本次运行对该主机的请求预算已用完"""
+
+
+class RateLimiter:
+    """令牌桶限速器（线程安全）"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """阻塞直到拿到一个令牌"""
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """连续失败达到阈值后熔断，冷却期过后放行一次试探请求"""
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            # 半开：冷却期过后只放行一个试探请求
+            if not self.probing and time.monotonic() - self.opened_at >= self.cooldown:
+                self.probing = True
+                return True
+            return False
+
+    def release(self):
+        """请求未产生结论（限流、未发出）：放回试探名额，不改变失败计数"""
+        with self.lock:
+            self.probing = False
+
+    def record(self, ok: bool):
+        with self.lock:
+            self.probing = False
+            if ok:
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+def get_breaker(endpoint: str) -> CircuitBreaker:
+    with _breakers_lock:
+        if endpoint not in _breakers:
+            _breakers[endpoint] = CircuitBreaker(HTTP_CONFIG["breaker_threshold"], HTTP_CONFIG["breaker_cooldown"])
+        return _breakers[endpoint]
+
+
+def set_request_budget(host: str, budget: int):
+    """限制本次运行对指定主机的请求总数（含重试）"""
+    with _budgets_lock:
+        _budgets[host] = budget
+
+
+def take_budget(host: str) -> bool:
+    """消耗一次请求预算，未设置预算的主机不受限"""
+    with _budgets_lock:
+        if host not in _budgets:
+            return True
+        if _budgets[host] <= 0:
+            return False
+        _budgets[host] -= 1
+        return True
+
+
+def retry_after_seconds(resp: requests.Response) -> float:
+    """解析 Retry-After（秒数或 HTTP 日期），没有时返回 None"""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_seconds(attempt: int) -> float:
+    """指数退避 + 全抖动"""
+    return random.uniform(0, min(HTTP_CONFIG["backoff_max"], HTTP_CONFIG["backoff_base"] * 2 ** attempt))
+
+
+def get_session(pool_size: int = 16) -> requests.Session:
+    """获取进程内共享的 Session（keep-alive 连接池）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def set_host_rate_limit(host: str, rate: float, burst: int = 1):
+    """为指定主机设置每秒请求数上限"""
+    with _limiters_lock:
+        _limiters[host] = RateLimiter(rate, burst)
+
+
+def send(url: str, host: str, **kwargs) -> requests.Response:
+    """发出一次经过限速的 GET 请求，记录延迟、状态码和响应字节数"""
+    limiter = _limiters.get(host)
+    if limiter:
+        with metrics.timer("rate_limit_wait_seconds", host=host):
+            limiter.acquire()
+    try:
+        with metrics.timer("http_request_seconds", host=host):
+            resp = get_session().get(url, **kwargs)
+    except Exception:
+        metrics.inc("http_errors_total", host=host)
+        raise
+    metrics.inc("http_requests_total", host=host, status=resp.status_code)
+    metrics.inc("http_response_bytes_total", len(resp.content), host=host)
+    return resp
+
+
+def get(url: str, retries: int = 0, stage: str = None, **kwargs) -> requests.Response:
+    """GET 请求：失败或遇到 429/5xx 时按指数退避重试，遵守 Retry-After；
+    同一接口连续失败（不含 429 限流）会被熔断，请求预算用完后直接报错。
+    给定 stage 时退避等待不超过该阶段的剩余时间，阶段到时限后不再重试。
+    重试耗尽后返回最后一次响应（由调用方 raise_for_status）或抛出最后的异常。
+    """
+    parsed = urlparse(url)
+    host = parsed.netloc
+    breaker = get_breaker(f"{host}{parsed.path}")
+
+    last_error = None
+    for attempt in range(retries + 1):
+        # 退避等待后阶段已到时限：不再重试，交回上一次的结果
+        if attempt and stage_expired(stage):
+            metrics.inc("http_retries_abandoned_total", host=host)
+            if last_error is not None:
+                raise last_error
+            return resp
+        # 先看熔断再扣预算，被熔断拒绝的请求不消耗预算
+        if not breaker.allow():
+            metrics.inc("http_circuit_open_total", host=host)
+            raise CircuitOpenError(f"circuit open for {host}{parsed.path}")
+        if not take_budget(host):
+            breaker.release()
+            metrics.inc("http_budget_exhausted_total", host=host)
+            raise BudgetExhaustedError(f"request budget exhausted for {host}")
+
+        try:
+            resp = send(url, host, **kwargs)
+            last_error = None
+        except requests.RequestException as e:
+            breaker.record(False)
+            if attempt >= retries or stage_expired(stage):
+                raise
+            last_error = e
+            wait = backoff_seconds(attempt)
+            reason = type(e).__name__
+        else:
+            if resp.status_code not in RETRY_STATUSES:
+                breaker.record(True)
+                return resp
+            # 429 是限流反压而非故障：按 Retry-After 等待，不计入熔断
+            if resp.status_code == 429:
+                breaker.release()
+            else:
+                breaker.record(False)
+            if attempt >= retries or stage_expired(stage):
+                return resp
+            wait = retry_after_seconds(resp)
+            if wait is None:
+                wait = backoff_seconds(attempt)
+            elif wait > HTTP_CONFIG["max_retry_after"]:
+                return resp
+            reason = str(resp.status_code)
+
+        if stage:
+            wait = min(wait, max(0.0, deadline.stage_remaining(stage)))
+        metrics.inc("http_retries_total", host=host, reason=reason)
+        time.sleep(wait)
+
+
+def stage_expired(stage: str) -> bool:
+    return stage is not None and deadline.stage_remaining(stage) <= 0
@@ -0,0 +1,188 @@
+"""情报条目存储 - 跨运行去重、历史保留与增量查询（SQLite）"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import metrics
+from config import DATA_DIR, MAX_HISTORY, SEEN_HISTORY
+
+STORE_DB = os.path.join(DATA_DIR, "items.db")
+# 检索库打不开的原因，只提示一次
+_index_error = None
+
+
+def item_uid(item: dict) -> str:
+    """条目唯一键：推文按 id，文章按链接哈希"""
+    if item.get("source") == "x":
+        return f"x:{item.get('id')}"
+    link = item.get("link") or item.get("url") or item.get("title", "")
+    return f"{item.get('source', 'rss')}:{hashlib.sha1(link.encode('utf-8')).hexdigest()}"
+
+
+def published_at(item: dict) -> str:
+    """解析发布时间为 UTC ISO 字符串，无法解析时返回空字符串"""
+    value = item.get("created_at") or item.get("published") or ""
+    for parse in (
+        lambda v: datetime.strptime(v, "%a %b %d %H:%M:%S %z %Y"),
+        parsedate_to_datetime,
+        datetime.fromisoformat,
+    ):
+        try:
+            t = parse(value)
+        except (TypeError, ValueError, IndexError):
+            continue
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        return t.astimezone(timezone.utc).isoformat()
+    return ""
+
+
+def utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def open_index():
+    """打开全文检索库；SQLite 不支持 FTS5 trigram 或缺少 jinja2 时返回 None，条目库照常工作"""
+    global _index_error
+    try:
+        from search_index import SearchIndex
+        return SearchIndex()
+    except (ImportError, sqlite3.OperationalError) as e:
+        if _index_error is None:
+            _index_error = str(e)
+            print(f"Search index unavailable, items will not be indexed: {e}")
+        metrics.inc("search_index_unavailable_total")
+        return None
+
+
+class ItemStore:
+    """追加写入的条目库，分析结果回写到同一行；新增和分析后的条目同步写入全文检索库"""
+
+    def __init__(self, path: str = STORE_DB, index: bool = True):
+        self.conn = sqlite3.connect(path)
+        self.index = open_index() if index else None
+        self.conn.executescript(
+            """CREATE TABLE IF NOT EXISTS items (
+                uid TEXT PRIMARY KEY,
+                source TEXT NOT NULL,
+                published_at TEXT NOT NULL,
+                fetched_at TEXT NOT NULL,
+                analyzed_at TEXT,
+                priority TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_items_source ON items (source);
+            CREATE INDEX IF NOT EXISTS idx_items_published ON items (published_at);
+            CREATE INDEX IF NOT EXISTS idx_items_fetched ON items (fetched_at);
+            CREATE INDEX IF NOT EXISTS idx_items_priority ON items (priority);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS seen (
+                uid TEXT PRIMARY KEY,
+                seen_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_seen_at ON seen (seen_at);"""
+        )
+        # 旧版本的库没有 seen 表，用现有条目补齐
+        if self.conn.execute("SELECT 1 FROM seen LIMIT 1").fetchone() is None:
+            self.conn.execute("INSERT OR IGNORE INTO seen (uid, seen_at) SELECT uid, fetched_at FROM items")
+            self.conn.commit()
+
+    def add_items(self, items: list) -> list:
+        """写入条目，见过的（包括已按保留期清理的）跳过，返回本次新增的条目"""
+        now = utc_now()
+        new_items = []
+        new_entries = []
+        for item in items:
+            uid, published = item_uid(item), published_at(item) or now
+            if not self.conn.execute("INSERT OR IGNORE INTO seen (uid, seen_at) VALUES (?, ?)", (uid, now)).rowcount:
+                continue
+            cur = self.conn.execute(
+                "INSERT OR IGNORE INTO items (uid, source, published_at, fetched_at, data) VALUES (?, ?, ?, ?, ?)",
+                (uid, item.get("source", ""), published, now, json.dumps(item, ensure_ascii=False)),
+            )
+            if cur.rowcount:
+                new_items.append(item)
+                new_entries.append((uid, published, item))
+                metrics.inc("items_new_total", source=item.get("source", ""))
+        self.conn.commit()
+        if self.index:
+            self.index.add(new_entries)
+        return new_items
+
+    def save_analysis(self, items: list):
+        """回写分析后的条目（含 priority 等字段）"""
+        now = utc_now()
+        self.conn.executemany(
+            "UPDATE items SET analyzed_at = ?, priority = ?, data = ? WHERE uid = ?",
+            [(now, item.get("priority"), json.dumps(item, ensure_ascii=False), item_uid(item))
+             for item in items],
+        )
+        self.conn.commit()
+        if self.index:
+            entries = [(item_uid(item), published_at(item) or now, item) for item in items]
+            self.index.add(entries)
+
+    def query(self, where: str = "1", params: tuple = ()) -> list:
+        """按条件查询条目，按发布时间倒序"""
+        rows = self.conn.execute(
+            f"SELECT data FROM items WHERE {where} ORDER BY published_at DESC", params
+        ).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def unanalyzed(self) -> list:
+        """尚未分析的条目"""
+        return self.query("analyzed_at IS NULL")
+
+    def fetched_since(self, since: str) -> list:
+        """在指定时间之后抓取的条目"""
+        return self.query("fetched_at > ?", (since,))
+
+    def recent(self, hours: float) -> list:
+        """最近若干小时内抓取的条目"""
+        since = (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+        return self.fetched_since(since)
+
+    def fetched_by_day(self, days: int = MAX_HISTORY) -> dict:
+        """最近若干天内抓取的条目，按抓取日期（UTC）分组: {"YYYY-MM-DD": [条目]}"""
+        since = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        grouped = {}
+        rows = self.conn.execute(
+            "SELECT substr(fetched_at, 1, 10), data FROM items WHERE fetched_at > ? ORDER BY published_at DESC",
+            (since,),
+        )
+        for day, data in rows:
+            grouped.setdefault(day, []).append(json.loads(data))
+        return grouped
+
+    def prune(self, days: int = MAX_HISTORY, seen_days: int = SEEN_HISTORY) -> int:
+        """删除超过保留天数的条目，返回删除数量；去重记录按更长的 seen_days 清理"""
+        now = datetime.now(timezone.utc)
+        cutoff = (now - timedelta(days=days)).isoformat()
+        removed = self.conn.execute("DELETE FROM items WHERE fetched_at < ?", (cutoff,)).rowcount
+        self.conn.execute("DELETE FROM seen WHERE seen_at < ?", ((now - timedelta(days=seen_days)).isoformat(),))
+        self.conn.commit()
+        if self.index:
+            self.index.prune()
+        return removed
+
+    def get_meta(self, key: str, default: str = "") -> str:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+        if self.index:
+            self.index.close()
@@ -0,0 +1,196 @@
+"""LLM 调用后端 - openclaw CLI、常驻 HTTP 客户端（连接池复用、流式响应）和测试用桩
+
+所有后端实现 complete(prompt, timeout) -> str，失败时抛出 BackendError；model 属性为实际使用的模型，
+用于分析结果缓存的键。
+"""
+import json
+import re
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import http_client
+import metrics
+from classifier import classify
+from config import ANALYZE_CONFIG, LLM_CONFIG
+
+_backends = None
+_backends_lock = threading.Lock()
+
+
+class BackendError(Exception):
+    """后端调用失败（进程退出码非零、HTTP 错误、超时等）"""
+
+
+class CliBackend:
+    """每次调用启动一个 openclaw ask 进程"""
+
+    name = "cli"
+
+    @property
+    def model(self) -> str:
+        return ANALYZE_CONFIG["model"]
+
+    def complete(self, prompt: str, timeout: float) -> str:
+        try:
+            result = subprocess.run(
+                ["openclaw", "ask", "--model", ANALYZE_CONFIG["model"], prompt],
+                capture_output=True,
+                text=True,
+                timeout=timeout,
+            )
+        except subprocess.TimeoutExpired:
+            # 异常信息里带着完整命令行（含提示），只报告超时
+            raise BackendError(f"openclaw timed out after {timeout:.1f}s")
+        except (OSError, subprocess.SubprocessError) as e:
+            raise BackendError(str(e))
+        if result.returncode != 0:
+            raise BackendError(f"openclaw exited with code {result.returncode}")
+        return result.stdout
+
+
+class HttpBackend:
+    """OpenAI 兼容的 chat/completions 接口，整个运行共用一个连接池；支持流式读取"""
+
+    name = "http"
+
+    def __init__(self, api_base: str, api_key: str, model: str, stream: bool = True):
+        self.url = f"{api_base.rstrip('/')}/chat/completions"
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.model = model
+        self.stream = stream
+
+    def complete(self, prompt: str, timeout: float) -> str:
+        """发送提示并返回完整回复"""
+        breaker = http_client.get_breaker(self.url)
+        if not breaker.allow():
+            raise BackendError(f"circuit open for {self.url}")
+        deadline = time.monotonic() + timeout
+        body = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0.2,
+            "stream": self.stream,
+        }
+        try:
+            resp = http_client.get_session().post(
+                self.url, headers=self.headers, json=body, stream=self.stream, timeout=(10, timeout)
+            )
+        except Exception as e:
+            breaker.record(False)
+            raise BackendError(str(e))
+        try:
+            if resp.status_code != 200:
+                # 限流和 4xx（鉴权失败、模型不存在等配置问题）不说明服务是否健康，既不计失败也不清零失败计数
+                if resp.status_code == 429 or resp.status_code not in http_client.RETRY_STATUSES:
+                    breaker.release()
+                else:
+                    breaker.record(False)
+                raise BackendError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+            if self.stream:
+                text = self.read_stream(resp, deadline)
+            else:
+                text = resp.json()["choices"][0]["message"]["content"]
+        except BackendError:
+            raise
+        except Exception as e:
+            breaker.record(False)
+            raise BackendError(str(e))
+        finally:
+            resp.close()
+        breaker.record(True)
+        return text
+
+    def read_stream(self, resp, deadline: float) -> str:
+        """读取 SSE 流（data: {...} 行，以 data: [DONE] 结束），超过时限即中止"""
+        start = time.monotonic()
+        chunks = []
+        # text/event-stream 按规范固定为 UTF-8；不指定时 requests 会按 ISO-8859-1 解码
+        resp.encoding = "utf-8"
+        for line in resp.iter_lines(decode_unicode=True):
+            if time.monotonic() > deadline:
+                raise BackendError("stream exceeded deadline")
+            if not line or not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+            if not delta:
+                continue
+            if not chunks:
+                metrics.observe("llm_first_token_seconds", time.monotonic() - start)
+            chunks.append(delta)
+        return "".join(chunks)
+
+
+class StubBackend:
+    """本地测试用：不调用模型，按关键词分类逐条返回合格的 JSON 结果，并记录收到的提示"""
+
+    name = "stub"
+    model = "stub"
+    HEADER_RE = re.compile(r"^\s*=+\s*条目\s*(\d+)\s*=+\s*$", re.MULTILINE)
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.prompts = []
+
+    def complete(self, prompt: str, timeout: float) -> str:
+        self.prompts.append(prompt)
+        if self.latency:
+            time.sleep(min(self.latency, timeout))
+        headers = list(self.HEADER_RE.finditer(prompt))
+        lines = []
+        for i, m in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(prompt)
+            priority, category = classify(prompt[m.end():end])
+            lines.append(json.dumps({
+                "id": int(m.group(1)),
+                "title": "",
+                "summary": "",
+                "priority": priority,
+                "category": category,
+                "impact": "中性",
+                "related_tokens": "",
+                "suggested_action": "持续关注",
+            }, ensure_ascii=False))
+        return "\n".join(lines)
+
+
+def build_backends(name: str = LLM_CONFIG["backend"]) -> list:
+    """按名称创建后端列表，依次尝试；非 CLI 后端按配置附加 CLI 作为备用"""
+    if name == "stub":
+        return [StubBackend()]
+    backends = []
+    if name == "http":
+        if LLM_CONFIG["api_base"] and LLM_CONFIG["api_key"]:
+            backends.append(HttpBackend(
+                LLM_CONFIG["api_base"], LLM_CONFIG["api_key"],
+                LLM_CONFIG["model"] or ANALYZE_CONFIG["model"], LLM_CONFIG["stream"],
+            ))
+        else:
+            print("LLM_API_BASE / LLM_API_KEY not set, using openclaw CLI")
+    elif name != "cli":
+        print(f"Unknown LLM backend '{name}', using openclaw CLI")
+    if not backends or LLM_CONFIG["fallback_cli"]:
+        backends.append(CliBackend())
+    return backends
+
+
+def get_backends() -> list:
+    """进程内共享的后端列表"""
+    global _backends
+    with _backends_lock:
+        if _backends is None:
+            _backends = build_backends()
+        return _backends
+
+
+def set_backends(backends: list):
+    """替换进程内的后端（测试或基准测试中注入桩）"""
+    global _backends
+    with _backends_lock:
+        _backends = backends
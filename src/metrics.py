@@ -0,0 +1,189 @@
+"""运行指标 - 阶段耗时、请求延迟直方图、计数器，输出 JSON 运行报告和 Prometheus 文本"""
+import json
+import os
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import METRICS_CONFIG
+
+# 延迟直方图的桶上限（秒）
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# 每个直方图保留的样本数上限，用于估算分位数
+MAX_SAMPLES = 1000
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_stages = {}
+
+
+def metric_key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((labels or {}).items()))
+
+
+class Histogram:
+    """固定分桶直方图，附带蓄水池采样用于计算分位数"""
+
+    def __init__(self):
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = []
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+        self.count += 1
+        self.sum += value
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append(value)
+        else:
+            j = random.randrange(self.count)
+            if j < MAX_SAMPLES:
+                self.samples[j] = value
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 4),
+            "p50": round(self.quantile(0.5), 4),
+            "p95": round(self.quantile(0.95), 4),
+            "max": round(max(self.samples, default=0.0), 4),
+            "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], self.buckets)),
+        }
+
+
+def inc(name: str, value: float = 1, **labels):
+    """计数器累加"""
+    key = metric_key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def observe(name: str, value: float, **labels):
+    """记录一次观测值（通常为秒）"""
+    key = metric_key(name, labels)
+    with _lock:
+        _histograms.setdefault(key, Histogram()).observe(value)
+
+
+def quantile(name: str, q: float, **labels) -> float:
+    """已记录观测值的分位数，没有数据时返回 0"""
+    with _lock:
+        hist = _histograms.get(metric_key(name, labels))
+        return hist.quantile(q) if hist else 0.0
+
+
+def count(name: str, **labels) -> int:
+    """已记录的观测次数"""
+    with _lock:
+        hist = _histograms.get(metric_key(name, labels))
+        return hist.count if hist else 0
+
+
+@contextmanager
+def timer(name: str, **labels):
+    """统计代码块耗时到直方图"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+@contextmanager
+def stage(name: str):
+    """统计整个阶段的耗时"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        with _lock:
+            _stages[name] = _stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def snapshot() -> dict:
+    """当前进程的全部指标"""
+    with _lock:
+        return {
+            "stages": {name: round(seconds, 4) for name, seconds in _stages.items()},
+            "counters": [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(_counters.items())
+            ],
+            "histograms": [
+                {"name": name, "labels": dict(labels), **hist.summary()}
+                for (name, labels), hist in sorted(_histograms.items())
+            ],
+        }
+
+
+def run_id() -> str:
+    """运行标识：GitHub Actions 的 run id，本地运行时按日期"""
+    return os.getenv("GITHUB_RUN_ID") or datetime.now(timezone.utc).strftime("local-%Y-%m-%d")
+
+
+def write_report(component: str):
+    """把本进程的指标合并进运行报告；各脚本分进程运行时按组件分别记录"""
+    path = METRICS_CONFIG["report_file"]
+    report = {}
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                report = json.load(f)
+        except (OSError, ValueError):
+            report = {}
+    # 新一次运行，丢弃上次的报告
+    if report.get("run_id") != run_id():
+        report = {"run_id": run_id(), "components": {}}
+
+    report["updated_at"] = datetime.now(timezone.utc).isoformat()
+    report["components"][component] = snapshot()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if METRICS_CONFIG["prometheus_file"]:
+        write_prometheus(METRICS_CONFIG["prometheus_file"], report)
+
+
+def prom_labels(labels: dict, **extra) -> str:
+    pairs = sorted({**labels, **extra}.items())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+def write_prometheus(path: str, report: dict):
+    """把运行报告中各组件的指标写成 Prometheus 文本格式（textfile collector）"""
+    prefix = "crypto_monitor_"
+    lines = []
+    for component, data in sorted(report["components"].items()):
+        for name, seconds in sorted(data["stages"].items()):
+            lines.append(f"{prefix}stage_seconds{prom_labels({}, component=component, stage=name)} {seconds}")
+        for c in data["counters"]:
+            lines.append(f"{prefix}{c['name']}{prom_labels(c['labels'], component=component)} {c['value']}")
+        for h in data["histograms"]:
+            cumulative = 0
+            for bound, count in h["buckets"].items():
+                cumulative += count
+                lines.append(f"{prefix}{h['name']}_bucket{prom_labels(h['labels'], component=component, le=bound)} {cumulative}")
+            lines.append(f"{prefix}{h['name']}_sum{prom_labels(h['labels'], component=component)} {h['sum']}")
+            lines.append(f"{prefix}{h['name']}_count{prom_labels(h['labels'], component=component)} {h['count']}")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp_path, path)
@@ -0,0 +1,141 @@
+"""常驻监控模式 - 持续轮询各来源，分析新条目并即时推送 P1 告警，按固定间隔重新生成静态报告"""
+import argparse
+import asyncio
+import signal
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+
+sys.path.insert(0, str(Path(__file__).parent))
+import deadline
+import http_client
+import metrics
+from alerts import build_sinks, dispatch
+from analyze import analyze_items
+from classifier import classify
+from config import MONITOR_CONFIG, X_API_CONFIG
+from dedupe import item_text
+from fetch_rss import collect_articles
+from fetch_x import collect_tweets
+from generate import generate_simple_report
+from item_store import ItemStore, published_at
+
+
+def is_recent(item: dict) -> bool:
+    """发布时间在告警时间窗口内；无法解析时间的条目视为新条目"""
+    published = published_at(item)
+    if not published:
+        return True
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=MONITOR_CONFIG["alert_max_age_hours"])
+    return published >= cutoff.isoformat()
+
+
+def is_keyword_search(item: dict) -> bool:
+    """X 关键词搜索的结果（不是监控账号发布的），内容天然命中搜索词，关键词分级不可靠"""
+    return item.get("source") == "x" and not item.get("query", "").startswith("from:")
+
+
+def process_new(items: list, skip_analyze: bool) -> list:
+    """入库去重、分析新条目，返回需要告警的 P1 条目"""
+    store = ItemStore()
+    try:
+        new_items = store.add_items(items)
+        if not new_items:
+            return []
+        if skip_analyze:
+            # 不调用 LLM 时用关键词分级，结果不回写条目库，留给正常的分析流程；
+            # 关键词搜索的结果只入库，不据此告警
+            analyzed = [
+                {**item, **dict(zip(("priority", "category"), classify(item_text(item))))}
+                for item in new_items if not is_keyword_search(item)
+            ]
+        else:
+            analyzed = analyze_items(new_items)
+            store.save_analysis(analyzed)
+    finally:
+        store.close()
+    print(f"New items: {len(new_items)}")
+    return [item for item in analyzed if item.get("priority") == "P1" and is_recent(item)]
+
+
+async def poll_once(sinks: list, skip_analyze: bool, interval: float):
+    """一轮轮询：X 和 RSS 并发抓取，新条目分析后推送 P1"""
+    # 每轮重新分配请求预算，避免常驻进程一次耗尽全部预算
+    http_client.set_request_budget(urlparse(X_API_CONFIG["api_base"]).netloc, MONITOR_CONFIG["request_budget"])
+    # 每轮的时限为轮询间隔，防止一轮拖慢后续轮询
+    deadline.start_run(interval)
+    with metrics.stage("monitor_poll"):
+        tweets, articles = await asyncio.gather(
+            asyncio.to_thread(collect_tweets),
+            asyncio.to_thread(collect_articles),
+        )
+        alerts = await asyncio.to_thread(process_new, tweets + articles, skip_analyze)
+        sent = await asyncio.to_thread(dispatch, sinks, alerts)
+    metrics.inc("monitor_polls_total")
+    if sent:
+        print(f"Pushed {sent} P1 alerts")
+
+
+async def wait_or_stop(stop: asyncio.Event, seconds: float) -> bool:
+    """等待指定秒数，期间收到停止信号时提前返回 True"""
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=seconds)
+        return True
+    except asyncio.TimeoutError:
+        return False
+
+
+async def poll_loop(stop: asyncio.Event, sinks: list, skip_analyze: bool, interval: float, once: bool):
+    while not stop.is_set():
+        try:
+            await poll_once(sinks, skip_analyze, interval)
+        except Exception as e:
+            metrics.inc("monitor_errors_total", task="poll")
+            print(f"Poll failed: {e}")
+        await asyncio.to_thread(metrics.write_report, "monitor")
+        await asyncio.to_thread(deadline.save_latency)
+        if once or await wait_or_stop(stop, interval):
+            break
+    stop.set()
+
+
+async def report_loop(stop: asyncio.Event, interval: float):
+    """按固定间隔重新生成静态报告"""
+    while not await wait_or_stop(stop, interval):
+        try:
+            await asyncio.to_thread(generate_simple_report)
+        except Exception as e:
+            metrics.inc("monitor_errors_total", task="report")
+            print(f"Report generation failed: {e}")
+
+
+async def run(sinks: list, skip_analyze: bool, interval: float, once: bool):
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    tasks = [poll_loop(stop, sinks, skip_analyze, interval, once)]
+    if MONITOR_CONFIG["report_interval"] and not once:
+        tasks.append(report_loop(stop, MONITOR_CONFIG["report_interval"]))
+    await asyncio.gather(*tasks)
+    print("Monitor stopped")
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="常驻监控：持续轮询并即时推送 P1 告警")
+    parser.add_argument("--sinks", default=MONITOR_CONFIG["sinks"], help="告警输出端，逗号分隔：stdout,file,webhook,stub")
+    parser.add_argument("--interval", type=float, default=MONITOR_CONFIG["poll_interval"], help="轮询间隔（秒）")
+    parser.add_argument("--skip-analyze", action="store_true", help="不调用 LLM，按关键词分级判断 P1（不含关键词搜索结果）")
+    parser.add_argument("--once", action="store_true", help="只轮询一轮后退出")
+    args = parser.parse_args()
+
+    sinks = build_sinks(args.sinks)
+    print(f"Monitoring with sinks: {', '.join(s.name for s in sinks) or 'none'}, interval {args.interval:.0f}s")
+    asyncio.run(run(sinks, args.skip_analyze, args.interval, args.once))
+
+
+if __name__ == "__main__":
+    main()
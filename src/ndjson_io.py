@@ -0,0 +1,55 @@
+"""NDJSON 读写 - 每行一条记录，逐条写出、惰性读取，可选 gzip/zstd 压缩"""
+import gzip
+import io
+import json
+import os
+
+SUFFIXES = {"": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def open_text(path: str, mode: str):
+    """按扩展名打开文本流；.zst 需要安装 zstandard"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    if path.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError:
+            raise RuntimeError("zstandard is required for .zst files: pip install zstandard")
+        raw = open(path, mode + "b")
+        if mode == "r":
+            # 追加写入的每一批是一个独立的帧，需要跨帧读取
+            stream = zstandard.ZstdDecompressor().stream_reader(raw, closefd=True, read_across_frames=True)
+        else:
+            stream = zstandard.ZstdCompressor().stream_writer(raw, closefd=True)
+        return io.TextIOWrapper(stream, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def write_records(path: str, records, append: bool = False) -> int:
+    """逐条写出记录，返回写出条数
+
+    覆盖写入时先写临时文件再替换，读者不会看到写了一半的旧文件；
+    追加写入直接写到文件末尾（压缩文件追加为新的压缩帧/成员）。
+    """
+    target = path if append else f"{path}.tmp{os.path.splitext(path)[1]}"
+    count = 0
+    with open_text(target, "a" if append else "w") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    if not append:
+        os.replace(target, path)
+    return count
+
+
+def read_records(path: str):
+    """惰性逐条读取；跳过空行和末尾未写完的行"""
+    with open_text(path, "r") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            line = line.strip()
+            if line:
+                yield json.loads(line)
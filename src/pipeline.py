@@ -0,0 +1,115 @@
+"""单进程运行完整流程：抓取 → 去重入库 → 分析 → 生成报告"""
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+import deadline
+import metrics
+from analyze import analyze_items, save_recommendations
+from config import DATA_COMPRESSION, DATA_DIR
+from fetch_rss import collect_articles
+from fetch_x import collect_tweets
+from generate import generate_simple_report
+from item_store import ItemStore
+from ndjson_io import SUFFIXES, read_records, write_records
+from triage import train_from_store
+
+CHECKPOINT_DIR = os.path.join(DATA_DIR, "checkpoints")
+
+
+class Checkpoints:
+    """阶段输出的检查点文件，用于调试和中断后续跑"""
+
+    def __init__(self, enabled: bool, resume: bool):
+        self.enabled = enabled or resume
+        self.resume = resume
+        if self.enabled:
+            os.makedirs(CHECKPOINT_DIR, exist_ok=True)
+
+    def path(self, name: str) -> str:
+        return os.path.join(CHECKPOINT_DIR, f"{name}.ndjson{SUFFIXES[DATA_COMPRESSION]}")
+
+    def run(self, name: str, fn):
+        """续跑时优先读取已有检查点，否则执行阶段并按需写出检查点"""
+        if self.resume and os.path.exists(self.path(name)):
+            result = list(read_records(self.path(name)))
+            print(f"Resumed {name} from checkpoint ({len(result)} records)")
+            return result
+        result = fn()
+        if self.enabled:
+            write_records(self.path(name), result)
+        return result
+
+
+@metrics.stage("pipeline")
+def run(skip_analyze: bool = False, checkpoint: bool = False, resume: bool = False, train_triage: bool = False):
+    """运行完整流程，阶段之间直接传递内存中的条目
+
+    整次运行受 RUN_CONFIG["deadline"] 约束；分析出错或超时都不影响最后生成报告。
+    """
+    deadline.start_run()
+    checkpoints = Checkpoints(checkpoint, resume)
+
+    # 1. X 和 RSS 并发抓取
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        x_job = pool.submit(checkpoints.run, "x_items", collect_tweets)
+        rss_job = pool.submit(checkpoints.run, "rss_items", collect_articles)
+        tweets = x_job.result()
+        articles = rss_job.result()
+    print(f"Fetched {len(tweets)} tweets, {len(articles)} articles")
+
+    # 2. 入库去重（跨运行）
+    store = ItemStore()
+    try:
+        with metrics.stage("dedupe"):
+            new_items = store.add_items(tweets + articles)
+        print(f"New items: {len(new_items)}")
+
+        # 3. 分析尚未分析的条目；失败时报告退回关键词分级，未分析的条目留到下次
+        if not skip_analyze:
+            try:
+                analyze_stage(store, checkpoints, train_triage)
+            except Exception as e:
+                metrics.inc("stage_errors_total", stage="analyze")
+                print(f"Analysis failed, publishing report without it: {e}")
+    finally:
+        store.close()
+
+    # 4. 生成报告
+    generate_simple_report()
+    print(f"Run finished with {deadline.run_remaining():.0f}s to spare")
+
+
+def analyze_stage(store: ItemStore, checkpoints: Checkpoints, train_triage: bool):
+    pending = store.unanalyzed()
+    analyzed = checkpoints.run("analyzed_items", lambda: analyze_items(pending))
+    store.save_analysis(analyzed)
+    save_recommendations(analyzed)
+    print(f"Analyzed {len(analyzed)} items")
+    if train_triage:
+        with metrics.stage("triage_train"):
+            train_from_store()
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="运行加密货币合规情报完整流程")
+    parser.add_argument("--skip-analyze", action="store_true", help="跳过 LLM 分析，报告使用关键词分级")
+    parser.add_argument("--checkpoint", action="store_true", help=f"把各阶段输出写到 {CHECKPOINT_DIR}")
+    parser.add_argument("--resume", action="store_true", help="已有检查点的阶段直接读取，不重新执行")
+    parser.add_argument("--train-triage", action="store_true", help="分析后用累积的 LLM 标签重新训练本地分级模型")
+    args = parser.parse_args()
+
+    try:
+        run(skip_analyze=args.skip_analyze, checkpoint=args.checkpoint, resume=args.resume,
+            train_triage=args.train_triage)
+    finally:
+        metrics.write_report("pipeline")
+        deadline.save_latency()
+
+
+if __name__ == "__main__":
+    main()
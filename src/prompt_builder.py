@@ -0,0 +1,112 @@
+"""提示压缩 - 清洗原文（HTML、链接、模板文字），按 token 预算保留信息量最高的句子
+
+估算规则：中文及全角字符每字约 1 token，其余字符每 4 个约 1 token。
+"""
+import html
+import re
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from classifier import match_rules
+from config import PROMPT_CONFIG
+
+TAG_RE = re.compile(r"<(script|style)\b.*?</\1\s*>|<[^>]+>", re.IGNORECASE | re.DOTALL)
+URL_RE = re.compile(r"https?://\S+|www\.\S+")
+RETWEET_RE = re.compile(r"^RT @\w+:\s*")
+SPACE_RE = re.compile(r"\s+")
+# RSS 摘要中常见的模板文字，整句丢弃
+BOILERPLATE_RE = re.compile(
+    r"the post .* appeared first on|read more|continue reading|click here|"
+    r"subscribe to|sign up for|all rights reserved|阅读全文|点击查看|原文链接",
+    re.IGNORECASE,
+)
+# 按中英文句末标点切句，标点保留在句尾
+SENTENCE_RE = re.compile(r"[^。！？；!?]+?(?:[。！？；]+|[.!?]+(?=\s|$)|$)")
+WIDE_RE = re.compile(r"[　-〿一-鿿＀-￯]")
+NUMBER_RE = re.compile(r"\d")
+PRIORITY_WEIGHT = {"P1": 3, "P2": 2, "P3": 1}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数，用于预算控制，不依赖具体模型的分词器"""
+    wide = len(WIDE_RE.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+def clean_text(text: str) -> str:
+    """去掉 HTML 标签和实体、链接、转推前缀、模板句和重复句，合并空白"""
+    text = html.unescape(TAG_RE.sub(" ", text))
+    text = RETWEET_RE.sub("", URL_RE.sub(" ", text.strip()))
+    sentences = {}
+    for s in split_sentences(SPACE_RE.sub(" ", text)):
+        if not BOILERPLATE_RE.search(s):
+            sentences.setdefault(s, None)
+    return join_sentences(list(sentences))
+
+
+def join_sentences(sentences: list) -> str:
+    """英文句子之间补空格，中文句子直接相连"""
+    parts = []
+    for s in sentences:
+        if parts and not WIDE_RE.match(parts[-1][-1]):
+            parts.append(" ")
+        parts.append(s)
+    return "".join(parts)
+
+
+def split_sentences(text: str) -> list:
+    return [s.strip() for s in SENTENCE_RE.findall(text) if s.strip()]
+
+
+def salience(sentence: str, position: int) -> int:
+    """句子得分：命中分类规则（按优先级加权）、含数字金额、首句（通常是导语）"""
+    score = sum(PRIORITY_WEIGHT[r.priority] for r in match_rules(sentence))
+    if NUMBER_RE.search(sentence):
+        score += 1
+    if position == 0:
+        score += 2
+    return score
+
+
+def truncate_tokens(text: str, budget: int) -> str:
+    """按估算 token 截断单段文本"""
+    used = 0
+    for i, ch in enumerate(text):
+        used += 1 if WIDE_RE.match(ch) else 0.25
+        if used > budget:
+            return text[:i].rstrip() + "…"
+    return text
+
+
+def compact(text: str, budget: int = PROMPT_CONFIG["item_tokens"]) -> str:
+    """清洗后在预算内按得分挑选句子，保持原文顺序；首句单独超出预算时截断"""
+    text = clean_text(text)
+    if estimate_tokens(text) <= budget:
+        return text
+    sentences = split_sentences(text)
+    costs = [estimate_tokens(s) + 1 for s in sentences]
+    order = sorted(range(len(sentences)), key=lambda i: -salience(sentences[i], i))
+    keep, used = set(), 0
+    for i in order:
+        if used + costs[i] <= budget:
+            keep.add(i)
+            used += costs[i]
+    if not keep:
+        return truncate_tokens(sentences[order[0]], budget)
+    return join_sentences([sentences[i] for i in sorted(keep)])
+
+
+def pack_batches(contents: list, max_items: int, max_tokens: int) -> list:
+    """按条数和估算 token 数把内容顺序装箱，返回 [[内容, ...], ...]"""
+    batches, batch, used = [], [], 0
+    for content in contents:
+        cost = estimate_tokens(compact(content)) + PROMPT_CONFIG["item_overhead"]
+        if batch and (len(batch) >= max_items or used + cost > max_tokens):
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append(content)
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
@@ -0,0 +1,58 @@
+"""查询规划 - 把多个账号合并为 (from:a OR from:b ...) 查询，减少 API 调用"""
+import sys
+from collections import namedtuple
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import X_API_CONFIG
+from fetch_state import since_operator, tweet_id_value
+
+# query: 完整查询串；usernames: 组内账号；mark: 组内最旧的高水位（用于 since_id）
+QueryGroup = namedtuple("QueryGroup", ["query", "usernames", "mark"])
+
+# 为 since_id 运算符预留的长度
+SINCE_RESERVE = len(" since_id:") + 20
+
+
+def group_mark(marks: list) -> dict:
+    """组内取最旧的高水位；任一账号没有高水位时整组不加 since 限制"""
+    if not marks or any(not m or not m.get("since_id") for m in marks):
+        return {}
+    return min(marks, key=lambda m: tweet_id_value(m["since_id"]))
+
+
+def build_query(usernames: list, keywords: str, mark: dict) -> str:
+    accounts = " OR ".join(f"from:{u}" for u in usernames)
+    clause = f"({accounts})" if len(usernames) > 1 else accounts
+    return f"{clause} {keywords} {since_operator(mark)}".strip()
+
+
+def plan_account_queries(accounts: list, keywords: str, state: dict,
+                         max_length: int = X_API_CONFIG["max_query_length"]) -> list:
+    """按顺序把账号装入尽量少的合并查询，每条查询不超过 max_length
+
+    state 为 fetch_state 的高水位表，键为 "from:<小写用户名>"。
+    """
+    groups = []
+    current = []
+    budget = max_length - len(keywords) - SINCE_RESERVE - 2
+
+    def flush():
+        if current:
+            mark = group_mark([state.get(f"from:{u.lower()}") for u in current])
+            groups.append(QueryGroup(build_query(current, keywords, mark), list(current), mark))
+            current.clear()
+
+    length = 0
+    for account in accounts:
+        username = account["username"]
+        # 每个账号占 "from:xxx" 加上 " OR " 分隔符
+        cost = len(f"from:{username}") + (4 if current else 0)
+        if current and length + cost > budget:
+            flush()
+            length = 0
+            cost = len(f"from:{username}")
+        current.append(username)
+        length += cost
+    flush()
+    return groups
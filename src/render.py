@@ -0,0 +1,73 @@
+"""HTML 渲染 - 预编译并缓存 Jinja2 模板，流式写出文件"""
+import filecmp
+import hashlib
+import os
+import shutil
+import sys
+from pathlib import Path
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import BASE_DIR, DATA_DIR
+
+TEMPLATE_DIR = os.path.join(BASE_DIR, "templates")
+BYTECODE_DIR = os.path.join(DATA_DIR, "template_cache")
+
+_env = None
+_template_version = None
+
+
+def get_env() -> Environment:
+    """进程内共享的模板环境：自动转义，编译结果缓存到磁盘"""
+    global _env
+    if _env is None:
+        os.makedirs(BYTECODE_DIR, exist_ok=True)
+        _env = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=select_autoescape(["html"]),
+            bytecode_cache=FileSystemBytecodeCache(BYTECODE_DIR),
+            auto_reload=False,
+            trim_blocks=True,
+            lstrip_blocks=True,
+        )
+    return _env
+
+
+def template_version() -> str:
+    """全部模板文件内容的摘要，模板修改后所有报告都需重新渲染"""
+    global _template_version
+    if _template_version is None:
+        h = hashlib.sha256()
+        for name in sorted(os.listdir(TEMPLATE_DIR)):
+            h.update(name.encode("utf-8"))
+            with open(os.path.join(TEMPLATE_DIR, name), "rb") as f:
+                h.update(f.read())
+        _template_version = h.hexdigest()
+    return _template_version
+
+
+def replace_if_changed(tmp_path: str, path: str) -> bool:
+    """用临时文件替换目标文件；字节相同时保留原文件，返回是否写入"""
+    if os.path.exists(path) and filecmp.cmp(tmp_path, path, shallow=False):
+        os.remove(tmp_path)
+        return False
+    os.replace(tmp_path, path)
+    return True
+
+
+def render_to_file(template_name: str, path: str, **context) -> bool:
+    """按块流式渲染模板到文件，不在内存中拼接整页；内容未变化时不覆盖，返回是否写入"""
+    template = get_env().get_template(template_name)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for chunk in template.generate(**context):
+            f.write(chunk)
+    return replace_if_changed(tmp_path, path)
+
+
+def copy_if_changed(src: str, path: str) -> bool:
+    """复制文件，内容未变化时不覆盖，返回是否写入"""
+    tmp_path = f"{path}.tmp"
+    shutil.copyfile(src, tmp_path)
+    return replace_if_changed(tmp_path, path)
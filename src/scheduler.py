@@ -0,0 +1,87 @@
+"""账号轮询调度 - 根据历史发帖频率和 P1/P2 占比，在查询预算内决定本次轮询哪些账号"""
+import json
+import os
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from classifier import classify
+from config import DATA_DIR, SCHEDULER_CONFIG
+from query_planner import plan_account_queries
+
+STATE_FILE = os.path.join(DATA_DIR, "scheduler_state.json")
+
+
+def load_state() -> dict:
+    """加载调度状态: {小写用户名: {last_polled, rate, hot_ratio, polls}}"""
+    if os.path.exists(STATE_FILE):
+        try:
+            with open(STATE_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable scheduler state: {e}")
+    return {}
+
+
+def save_state(state: dict):
+    """保存调度状态"""
+    with open(STATE_FILE, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+
+
+def hours_since(iso: str, now: datetime) -> float:
+    try:
+        return max(0.0, (now - datetime.fromisoformat(iso)).total_seconds() / 3600)
+    except (TypeError, ValueError):
+        return float("inf")
+
+
+def score(account: dict, stats: dict, now: datetime) -> float:
+    """轮询得分：预计积累的新推文数 × 账号权重；从未轮询或超期的账号排在最前"""
+    elapsed = hours_since(stats.get("last_polled"), now)
+    if elapsed == float("inf") or elapsed >= SCHEDULER_CONFIG["max_interval_hours"]:
+        return float("inf")
+    weight = SCHEDULER_CONFIG["priority_weights"].get(account.get("priority"), 1)
+    hot = 1 + SCHEDULER_CONFIG["hot_weight"] * stats.get("hot_ratio", 0.0)
+    rate = stats.get("rate", SCHEDULER_CONFIG["prior_rate"])
+    return weight * hot * rate * elapsed / 24
+
+
+def select_accounts(accounts: list, state: dict, keywords: str) -> list:
+    """按得分排序，取能装进 max_queries 条合并查询的账号"""
+    now = datetime.now(timezone.utc)
+    priority_order = {"high": 0, "medium": 1, "low": 2}
+    ranked = sorted(
+        accounts,
+        key=lambda a: (-score(a, state.get(a["username"].lower(), {}), now),
+                       priority_order.get(a.get("priority"), 3)),
+    )
+    groups = plan_account_queries(ranked, keywords, {})[:SCHEDULER_CONFIG["max_queries"]]
+    selected = {u.lower() for g in groups for u in g.usernames}
+    return [a for a in ranked if a["username"].lower() in selected]
+
+
+def update_stats(state: dict, polled: dict, partial: set = frozenset()):
+    """用本次轮询结果更新统计量
+
+    polled 为 {小写用户名: 新推文列表}，包含本次实际查询过的所有账号；partial 中的账号未完整抓取，
+    推文数只是下限，估计的频率只升不降。
+    """
+    now = datetime.now(timezone.utc)
+    alpha = SCHEDULER_CONFIG["alpha"]
+    for username, tweets in polled.items():
+        stats = state.setdefault(username, {})
+        elapsed = hours_since(stats.get("last_polled"), now)
+        # 首次轮询时没有时间间隔，按一天估算；间隔过短时按下限计，避免频率被放大
+        hours = 24.0 if elapsed == float("inf") else max(elapsed, SCHEDULER_CONFIG["min_interval_hours"])
+        rate = len(tweets) * 24 / hours
+        if username in partial:
+            rate = max(rate, stats.get("rate", rate))
+        stats["rate"] = round(alpha * rate + (1 - alpha) * stats.get("rate", rate), 4)
+        if tweets:
+            hot = sum(1 for t in tweets if (t.get("priority") or classify(t.get("text", ""))[0]) in ("P1", "P2"))
+            ratio = hot / len(tweets)
+            stats["hot_ratio"] = round(alpha * ratio + (1 - alpha) * stats.get("hot_ratio", ratio), 4)
+        stats["last_polled"] = now.isoformat()
+        stats["polls"] = stats.get("polls", 0) + 1
@@ -0,0 +1,210 @@
+"""全文检索 - SQLite FTS5 倒排索引（trigram 分词，中英文均可检索），命令行查询与静态站点分片索引导出"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+from config import OUTPUT_DIR, SEARCH_CONFIG
+from render import render_to_file, replace_if_changed
+
+EXPORT_DIR = os.path.join(OUTPUT_DIR, "search")
+# trigram 分词要求查询词至少 3 个字符，更短的词（如“监管”）改用 LIKE 扫描
+MIN_MATCH_CHARS = 3
+# 客户端索引的分词：英文/数字按词，中文按相邻两字
+CLIENT_TOKEN_RE = re.compile(r"[a-z0-9]{2,}|[一-鿿]{2,}")
+URL_RE = re.compile(r"https?://\S+")
+
+
+def index_fields(item: dict) -> tuple:
+    """条目的 (标题, 正文)：推文没有标题时取正文开头；分析后的中文摘要、代币等一并索引"""
+    title = item.get("title") or item.get("text", "")[:120]
+    body = " ".join(filter(None, (
+        item.get("text", ""), item.get("summary", ""), item.get("related_tokens", ""),
+        item.get("suggested_action", ""), item.get("author", ""),
+    )))
+    return title, URL_RE.sub(" ", body)
+
+
+def client_tokens(text: str) -> set:
+    """客户端索引的词项；中文连续片段切成两字组，与 templates/search.html 中的实现一致"""
+    tokens = set()
+    for token in CLIENT_TOKEN_RE.findall(text.lower()):
+        if token[0].isascii():
+            tokens.add(token)
+        else:
+            tokens.update(token[i:i + 2] for i in range(len(token) - 1))
+    return tokens
+
+
+def shard_of(token: str, shards: int) -> int:
+    """词项所在的分片，31 进制多项式哈希，与客户端一致"""
+    h = 0
+    for ch in token:
+        h = (h * 31 + ord(ch)) & 0xFFFFFFFF
+    return h % shards
+
+
+class SearchIndex:
+    """独立于条目库的检索库，保留期更长（SEARCH_CONFIG["max_age_days"]）"""
+
+    def __init__(self, path: str = SEARCH_CONFIG["db"]):
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS docs USING fts5(
+                title, body,
+                uid UNINDEXED, source UNINDEXED, published_at UNINDEXED,
+                priority UNINDEXED, category UNINDEXED, url UNINDEXED,
+                tokenize = 'trigram'
+            );
+            CREATE TABLE IF NOT EXISTS doc_uids (
+                uid TEXT PRIMARY KEY,
+                doc_rowid INTEGER NOT NULL,
+                published_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_doc_uids_published ON doc_uids (published_at);"""
+        )
+        # FTS5 的 UNINDEXED 列按值删除要扫全表，uid 到 rowid 的映射单独建表；旧版本的库在此补齐
+        if self.conn.execute("SELECT 1 FROM doc_uids LIMIT 1").fetchone() is None:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO doc_uids (uid, doc_rowid, published_at) SELECT uid, rowid, published_at FROM docs"
+            )
+            self.conn.commit()
+
+    def add(self, entries: list):
+        """写入或更新条目（按 uid 覆盖）；entries 为 (uid, 发布时间, 条目) 列表"""
+        rows = []
+        for uid, published, item in entries:
+            title, body = index_fields(item)
+            rows.append((
+                title, body, uid, item.get("source", ""), published, item.get("priority", ""),
+                item.get("category", ""), item.get("url") or item.get("link", ""),
+            ))
+        for row in rows:
+            old = self.conn.execute("SELECT doc_rowid FROM doc_uids WHERE uid = ?", (row[2],)).fetchone()
+            if old:
+                self.conn.execute("DELETE FROM docs WHERE rowid = ?", old)
+            cur = self.conn.execute(
+                "INSERT INTO docs (title, body, uid, source, published_at, priority, category, url) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                row,
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO doc_uids (uid, doc_rowid, published_at) VALUES (?, ?, ?)",
+                (row[2], cur.lastrowid, row[4]),
+            )
+        self.conn.commit()
+
+    def search(self, query: str, days: int = None, priority: str = None, limit: int = 20) -> list:
+        """检索，所有词都需命中；有长词时按 bm25 排序，否则按发布时间倒序"""
+        terms = [t.replace('"', "") for t in query.split() if t.replace('"', "")]
+        if not terms:
+            return []
+        where, params = [], []
+        match_terms = [t for t in terms if len(t) >= MIN_MATCH_CHARS]
+        if match_terms:
+            where.append("docs MATCH ?")
+            params.append(" ".join(f'"{t}"' for t in match_terms))
+        for term in terms:
+            if len(term) < MIN_MATCH_CHARS:
+                where.append("(title LIKE ? OR body LIKE ?)")
+                params += [f"%{term}%"] * 2
+        if days:
+            where.append("published_at >= ?")
+            params.append((datetime.now(timezone.utc) - timedelta(days=days)).isoformat())
+        if priority:
+            where.append("priority = ?")
+            params.append(priority)
+        order = "rank" if match_terms else "published_at DESC"
+        rows = self.conn.execute(
+            f"SELECT uid, source, published_at, priority, category, url, title FROM docs "
+            f"WHERE {' AND '.join(where)} ORDER BY {order} LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        keys = ("uid", "source", "published_at", "priority", "category", "url", "title")
+        return [dict(zip(keys, row)) for row in rows]
+
+    def prune(self, days: int = SEARCH_CONFIG["max_age_days"]) -> int:
+        """删除超过保留期的条目，返回删除数量"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        removed = self.conn.execute(
+            "DELETE FROM docs WHERE rowid IN (SELECT doc_rowid FROM doc_uids WHERE published_at < ?)", (cutoff,)
+        ).rowcount
+        self.conn.execute("DELETE FROM doc_uids WHERE published_at < ?", (cutoff,))
+        self.conn.commit()
+        return removed
+
+    def export(self, out_dir: str = EXPORT_DIR, days: int = SEARCH_CONFIG["export_days"]) -> int:
+        """导出客户端分片索引：文档元数据按块切分，倒排表按词项哈希分片；返回写入的文件数"""
+        shards, chunk = SEARCH_CONFIG["export_shards"], SEARCH_CONFIG["export_chunk"]
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        rows = self.conn.execute(
+            "SELECT title, body, url, published_at, priority, source FROM docs "
+            "WHERE published_at >= ? ORDER BY published_at DESC",
+            (cutoff,),
+        )
+        docs = []
+        postings = [{} for _ in range(shards)]
+        for doc_id, (title, body, url, published, priority, source) in enumerate(rows):
+            docs.append([title, url, published[:10], priority, source])
+            for token in client_tokens(f"{title} {body}"):
+                postings[shard_of(token, shards)].setdefault(token, []).append(doc_id)
+
+        os.makedirs(out_dir, exist_ok=True)
+        files = {"meta.json": {"shards": shards, "chunk": chunk, "count": len(docs)}}
+        for i in range(0, len(docs), chunk):
+            files[f"docs-{i // chunk}.json"] = docs[i:i + chunk]
+        for i, shard in enumerate(postings):
+            files[f"shard-{i}.json"] = shard
+
+        written = 0
+        for name, data in files.items():
+            path = os.path.join(out_dir, name)
+            with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+            written += replace_if_changed(f"{path}.tmp", path)
+        # 删除不再需要的文档块
+        for name in os.listdir(out_dir):
+            if name not in files:
+                os.remove(os.path.join(out_dir, name))
+        written += render_to_file("search.html", os.path.join(OUTPUT_DIR, "search.html"))
+        print(f"Exported search index: {len(docs)} docs, {shards} shards, {written} files written")
+        return written
+
+    def close(self):
+        self.conn.close()
+
+
+def main():
+    """命令行检索"""
+    parser = argparse.ArgumentParser(description="检索历史情报条目")
+    parser.add_argument("query", nargs="*", help="检索词，空格分隔，全部命中")
+    parser.add_argument("--days", type=int, help="只看最近若干天")
+    parser.add_argument("--priority", choices=("P1", "P2", "P3"), help="按优先级过滤")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    parser.add_argument("--export", action="store_true", help=f"导出静态站点分片索引到 {EXPORT_DIR}")
+    args = parser.parse_args()
+
+    index = SearchIndex()
+    try:
+        if args.export:
+            index.export()
+        if args.query:
+            results = index.search(" ".join(args.query), days=args.days, priority=args.priority, limit=args.limit)
+            if args.json:
+                print(json.dumps(results, ensure_ascii=False, indent=2))
+            else:
+                for r in results:
+                    print(f"{r['published_at'][:10]} [{r['priority'] or '--'}] {r['title'][:80]}  {r['url']}")
+                print(f"{len(results)} results")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
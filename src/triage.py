@@ -0,0 +1,186 @@
+"""本地分级模型 - 哈希 n-gram 稀疏特征 + 线性 softmax 分类器，用累积的 LLM 分析结果训练
+
+用途：分析前预筛，明显的 P3 不再交给 LLM；LLM 不可用时替代关键词备用分析的优先级判定。
+依赖 numpy/scipy，未安装时 get_model() 返回 None，流程退回原有行为。
+"""
+import argparse
+import os
+import sys
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = sparse = None
+
+sys.path.insert(0, str(Path(__file__).parent))
+from classifier import FALLBACK_NOTE
+from config import DATA_DIR, TRIAGE_CONFIG
+from dedupe import TOKEN_RE, URL_RE, item_text
+from item_store import ItemStore
+
+MODEL_FILE = os.path.join(DATA_DIR, "triage_model.npz")
+CLASSES = ("P1", "P2", "P3")
+# 被本地模型预筛跳过的条目的标记，这类结果和备用分析一样不作为训练标签
+TRIAGE_NOTE = "本地分级模型预筛（未经 LLM 分析）"
+
+_model = None
+_model_mtime = None
+
+
+def ngrams(text: str) -> list:
+    """英文按词、中文按字切分，取一元和二元组"""
+    tokens = TOKEN_RE.findall(URL_RE.sub(" ", text.lower()))
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def featurize(texts: list, dims: int = TRIAGE_CONFIG["dims"]):
+    """文本 → CSR 稀疏矩阵：n-gram 哈希到固定维度，出现即为 1，按行 L2 归一化"""
+    indptr = [0]
+    indices = []
+    for text in texts:
+        indices.extend({zlib.crc32(g.encode("utf-8")) % dims for g in ngrams(text)})
+        indptr.append(len(indices))
+    indptr = np.asarray(indptr, dtype=np.int64)
+    counts = np.diff(indptr)
+    data = np.repeat(1.0 / np.sqrt(np.maximum(counts, 1)), counts)
+    return sparse.csr_matrix((data, np.asarray(indices, dtype=np.int64), indptr), shape=(len(texts), dims))
+
+
+def softmax(z):
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class TriageModel:
+    """多分类逻辑回归（softmax），全批量 AdaGrad 训练，类别按样本数反比加权"""
+
+    def __init__(self, weights=None, bias=None, dims: int = TRIAGE_CONFIG["dims"]):
+        self.dims = dims
+        self.weights = weights if weights is not None else np.zeros((dims, len(CLASSES)))
+        self.bias = bias if bias is not None else np.zeros(len(CLASSES))
+
+    def fit(self, texts: list, labels: list, epochs: int = TRIAGE_CONFIG["epochs"]):
+        X = featurize(texts, self.dims)
+        y = np.array([CLASSES.index(label) for label in labels])
+        Y = np.eye(len(CLASSES))[y]
+        counts = np.bincount(y, minlength=len(CLASSES))
+        sample_weight = (len(y) / (len(CLASSES) * np.maximum(counts, 1)))[y]
+        sample_weight /= sample_weight.sum()
+
+        lr, l2 = TRIAGE_CONFIG["learning_rate"], TRIAGE_CONFIG["l2"]
+        grad_sq_w = np.full_like(self.weights, 1e-8)
+        grad_sq_b = np.full_like(self.bias, 1e-8)
+        for _ in range(epochs):
+            G = (softmax(X @ self.weights + self.bias) - Y) * sample_weight[:, None]
+            grad_w = X.T @ G + l2 * self.weights
+            grad_b = G.sum(axis=0)
+            grad_sq_w += grad_w ** 2
+            grad_sq_b += grad_b ** 2
+            self.weights -= lr * grad_w / np.sqrt(grad_sq_w)
+            self.bias -= lr * grad_b / np.sqrt(grad_sq_b)
+        return self
+
+    def predict_proba(self, texts: list):
+        """返回 (n, 3) 概率矩阵，列顺序为 CLASSES"""
+        if not texts:
+            return np.zeros((0, len(CLASSES)))
+        return softmax(featurize(texts, self.dims) @ self.weights + self.bias)
+
+    def predict(self, texts: list) -> list:
+        return [CLASSES[i] for i in self.predict_proba(texts).argmax(axis=1)]
+
+    def save(self, path: str = MODEL_FILE, **info):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, weights=self.weights, bias=self.bias, dims=self.dims, **info)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str = MODEL_FILE):
+        with np.load(path) as data:
+            return cls(data["weights"], data["bias"], int(data["dims"]))
+
+
+def get_model():
+    """进程内共享的已训练模型；未安装 numpy/scipy、未训练或已关闭时返回 None"""
+    global _model, _model_mtime
+    if np is None or not TRIAGE_CONFIG["enabled"] or not os.path.exists(MODEL_FILE):
+        return None
+    mtime = os.stat(MODEL_FILE).st_mtime
+    if mtime != _model_mtime:
+        _model = TriageModel.load()
+        _model_mtime = mtime
+    return _model
+
+
+def training_data(items: list) -> tuple:
+    """从已分析条目中取 LLM 给出的标签；备用分析和预筛结果不算"""
+    texts, labels = [], []
+    for item in items:
+        if item.get("raw_analysis") in (FALLBACK_NOTE, TRIAGE_NOTE) or item.get("priority") not in CLASSES:
+            continue
+        texts.append(item.get("source_text") or item_text(item))
+        labels.append(item["priority"])
+    return texts, labels
+
+
+def train_from_store(holdout: float = 0.2) -> TriageModel:
+    """用条目库中的 LLM 标签训练并保存模型，样本不足或缺少依赖时返回 None"""
+    if np is None:
+        print("numpy/scipy not installed, skipping triage model training")
+        return None
+    store = ItemStore(index=False)
+    try:
+        texts, labels = training_data(store.query("analyzed_at IS NOT NULL"))
+    finally:
+        store.close()
+    if len(texts) < TRIAGE_CONFIG["min_samples"]:
+        print(f"Not enough LLM labels to train triage model ({len(texts)} < {TRIAGE_CONFIG['min_samples']})")
+        return None
+
+    # 先留出一部分评估，再用全部样本训练最终模型
+    order = np.random.default_rng(0).permutation(len(texts))
+    split = int(len(texts) * (1 - holdout))
+    train, test = order[:split], order[split:]
+    start = time.perf_counter()
+    model = TriageModel().fit([texts[i] for i in train], [labels[i] for i in train])
+    if len(test):
+        predicted = model.predict([texts[i] for i in test])
+        actual = [labels[i] for i in test]
+        accuracy = sum(p == a for p, a in zip(predicted, actual)) / len(test)
+        urgent = [(p, a) for p, a in zip(predicted, actual) if a != "P3"]
+        recall = sum(p != "P3" for p, _ in urgent) / len(urgent) if urgent else 0.0
+        print(f"Triage holdout: accuracy {accuracy:.2f}, P1/P2 recall {recall:.2f} on {len(test)} items")
+
+    model = TriageModel().fit(texts, labels)
+    model.save(samples=len(texts), trained_at=datetime.now(timezone.utc).isoformat())
+    print(f"Trained triage model on {len(texts)} labels in {time.perf_counter() - start:.1f}s")
+    return model
+
+
+def main():
+    """命令行：训练模型或给文本打分"""
+    parser = argparse.ArgumentParser(description="本地分级模型")
+    parser.add_argument("--train", action="store_true", help="用条目库中的 LLM 标签训练")
+    parser.add_argument("text", nargs="*", help="待分级的文本")
+    args = parser.parse_args()
+
+    if np is None:
+        sys.exit("numpy and scipy are required: pip install numpy scipy")
+    if args.train:
+        train_from_store()
+    if args.text:
+        model = get_model()
+        if model is None:
+            sys.exit(f"No trained model at {MODEL_FILE}, run with --train first")
+        probs = model.predict_proba([" ".join(args.text)])[0]
+        print("  ".join(f"{c}: {p:.2f}" for c, p in zip(CLASSES, probs)))
+
+
+if __name__ == "__main__":
+    main()
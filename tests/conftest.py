@@ -0,0 +1,9 @@
+"""测试公共设置：src 加入导入路径，数据和输出目录指向临时目录，不触碰 data/ 和 docs/"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="test-data-")
+os.environ["OUTPUT_DIR"] = tempfile.mkdtemp(prefix="test-docs-")
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+import analyze
+from analysis_cache import AnalysisCache, content_key
+from llm_backends import BackendError, StubBackend, set_backends
+
+CONTENT = "SEC charged an exchange with operating an unregistered securities platform"
+
+
+class FailingBackend:
+    name = "http"
+    model = "primary-model"
+
+    def complete(self, prompt, timeout):
+        raise BackendError("HTTP 503")
+
+
+@pytest.fixture
+def backends():
+    yield set_backends
+    set_backends(None)
+
+
+def test_cache_key_uses_model_that_answered(backends):
+    backends([FailingBackend(), StubBackend()])
+    [result] = analyze.analyze_contents([CONTENT])
+    assert result["model"] == "stub"
+    cache = AnalysisCache()
+    try:
+        assert cache.get_many([content_key(CONTENT, "primary-model")]) == {}
+        assert list(cache.get_many([content_key(CONTENT, "stub")]).values()) == [result]
+    finally:
+        cache.close()
+
+
+def line(**fields) -> str:
+    return json.dumps({"title": "标题", "priority": "P2", "category": "监管政策", **fields}, ensure_ascii=False)
+
+
+def test_parse_results_uses_ids():
+    parsed = analyze.parse_results("\n".join([line(id=2, priority="P1"), line(id=1)]))
+    assert {i: r["priority"] for i, (r, _) in parsed.items()} == {1: "P2", 2: "P1"}
+
+
+def test_parse_results_falls_back_to_position():
+    parsed = analyze.parse_results("\n".join([line(priority="P1"), line(id="two"), line()]))
+    assert {i: r["priority"] for i, (r, _) in parsed.items()} == {1: "P1", 2: "P2", 3: "P2"}
+
+
+def test_parse_results_rejects_invalid_schema():
+    parsed = analyze.parse_results("\n".join([line(id=1, priority="urgent"), "not json {", line(id=2)]))
+    assert list(parsed) == [2]
+    result, raw = parsed[2]
+    assert result["category"] == "监管政策"
+    assert json.loads(raw)["id"] == 2
+
+
+def test_parse_results_tolerates_pretty_printed_array():
+    response = "```json\n[\n" + line(id=1) + ",\n" + line(id=2, priority="P1") + "\n]\n```"
+    parsed = analyze.parse_results(response)
+    assert {i: r["priority"] for i, (r, _) in parsed.items()} == {1: "P2", 2: "P1"}
+
+
+def test_parse_results_accepts_single_line_array():
+    response = "[" + ", ".join([line(id=1, priority="P1"), line(id=2, category="未知")]) + "]"
+    parsed = analyze.parse_results(response)
+    assert {i: (r["priority"], r["category"]) for i, (r, _) in parsed.items()} == {1: ("P1", "监管政策"), 2: ("P2", "其他")}
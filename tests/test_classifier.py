@@ -0,0 +1,48 @@
+import pytest
+
+from classifier import classify
+
+
+@pytest.mark.parametrize("text", [
+    "SEC charged Binance with operating an unregistered exchange",
+    "SEC fined Kraken $30 million over its staking program",
+    "Regulators sued the exchange in federal court",
+    "Exchange banned in three states",
+    "Firm licensed under the new regime",
+])
+def test_inflected_enforcement_terms(text):
+    priority, _ = classify(text)
+    assert priority in ("P1", "P2"), text
+
+
+@pytest.mark.parametrize("text", [
+    "everything is fine with the network",
+    "Fine-tuning a model on onchain data",
+    "The band played at the crypto conference",
+    "Coinbase charges lower fees for stablecoin transfers",
+    "SEC enforcement director speaks at conference",
+    "Bitcoin holders charged up after the halving",
+])
+def test_no_false_positives(text):
+    assert classify(text) == ("P3", "其他")
+
+
+def test_enforcement_verbs_are_p1():
+    assert classify("SEC charged Binance")[0] == "P1"
+    assert classify("SEC fined Kraken $30 million")[0] == "P1"
+
+
+@pytest.mark.parametrize("text", [
+    "SEC charges Binance with operating an unregistered exchange",
+    "Founder charged with wire fraud",
+    "SEC sues Coinbase over staking",
+    "Exchange agrees to settle charges with CFTC",
+    "SEC announces enforcement actions against 10 firms",
+    "China extends its ban on crypto mining",
+])
+def test_enforcement_phrases_are_p1(text):
+    assert classify(text)[0] == "P1", text
+
+
+def test_generic_lawsuit_is_p2():
+    assert classify("Class action lawsuit filed against token issuer")[0] == "P2"
@@ -0,0 +1,14 @@
+import deadline
+from config import RUN_CONFIG
+
+
+def test_short_run_keeps_positive_stage_budgets():
+    deadline.start_run(60)
+    assert 40 < deadline.stage_remaining("fetch") <= 45
+    assert 40 < deadline.stage_remaining("analyze") <= 45
+
+
+def test_long_run_reserves_time_for_report():
+    deadline.start_run(1000)
+    assert deadline.stage_remaining("fetch") <= RUN_CONFIG["fetch_budget"]
+    assert deadline.stage_remaining("analyze") <= 1000 - RUN_CONFIG["report_reserve"]
@@ -0,0 +1,100 @@
+import fetch_x
+import metrics
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+def paged_api(pages: int, author: str = "", newest: int = 1000):
+    """模拟 advanced_search：共 pages 页，每页 2 条，id 从 newest 递减"""
+    def get(url, params=None, **kwargs):
+        page = int(params.get("cursor") or 0)
+        tweets = [
+            {"id": str(newest - page * 2 - k), "text": "t", "author": {"userName": author}}
+            for k in range(2)
+        ]
+        has_next = page + 1 < pages
+        return FakeResponse({"tweets": tweets, "next_cursor": str(page + 1) if has_next else ""})
+    return get
+
+
+def truncated_count():
+    return sum(c["value"] for c in metrics.snapshot()["counters"] if c["name"] == "x_pages_truncated_total")
+
+
+def test_more_pages_than_max_pages_is_incomplete(monkeypatch):
+    monkeypatch.setattr(fetch_x.http_client, "get", paged_api(pages=5))
+    before = truncated_count()
+    tweets, complete = fetch_x.search_tweets("from:sec_news", max_pages=3)
+    assert len(tweets) == 6
+    assert complete is False
+    assert truncated_count() == before + 1
+
+
+def test_last_page_within_max_pages_is_complete(monkeypatch):
+    monkeypatch.setattr(fetch_x.http_client, "get", paged_api(pages=3))
+    tweets, complete = fetch_x.search_tweets("from:sec_news", max_pages=3)
+    assert len(tweets) == 6
+    assert complete is True
+
+
+def run_collect(monkeypatch, state: dict, schedule: dict = None, **api):
+    """用内存中的高水位表和调度状态跑一次 collect_tweets，返回保存后的高水位表"""
+    schedule = {} if schedule is None else schedule
+    monkeypatch.setattr(fetch_x.http_client, "get", paged_api(**api))
+    monkeypatch.setattr(fetch_x, "load_state", lambda: dict(state))
+    monkeypatch.setattr(fetch_x, "save_state", lambda saved: state.update(saved))
+    monkeypatch.setattr(fetch_x.scheduler, "load_state", lambda: schedule)
+    monkeypatch.setattr(fetch_x.scheduler, "save_state", lambda saved: None)
+    fetch_x.collect_tweets()
+    return state
+
+
+def test_truncated_first_fetch_creates_marks(monkeypatch):
+    author = fetch_x.load_accounts()[0]["username"]
+    deep = fetch_x.X_API_CONFIG["max_pages"] + 7
+    state = run_collect(monkeypatch, {}, pages=deep, author=author)
+    assert state[f"from:{author.lower()}"]["since_id"] == "1000"
+    assert state["SEC enforcement"]["since_id"] == "1000"
+
+    # 下一次运行从高水位开始，遇到旧推文即停止翻页
+    state = run_collect(monkeypatch, state, pages=deep, author=author, newest=1004)
+    assert state[f"from:{author.lower()}"]["since_id"] == "1004"
+
+
+def test_truncated_queries_keep_existing_marks(monkeypatch):
+    author = fetch_x.load_accounts()[0]["username"]
+    key = f"from:{author.lower()}"
+    state = {key: {"since_id": "900"}, "SEC enforcement": {"since_id": "900"}}
+    state = run_collect(monkeypatch, state, pages=fetch_x.X_API_CONFIG["max_pages"] + 2, author=author)
+    assert state[key] == {"since_id": "900"}
+    assert state["SEC enforcement"] == {"since_id": "900"}
+
+
+def test_truncated_queries_still_update_schedule(monkeypatch):
+    author = fetch_x.load_accounts()[0]["username"]
+    schedule = {}
+    run_collect(monkeypatch, {}, schedule, pages=fetch_x.X_API_CONFIG["max_pages"] + 2, author=author)
+    polled = {a["username"].lower() for a in fetch_x.load_accounts()}
+    assert set(schedule) == polled
+    assert all("last_polled" in stats for stats in schedule.values())
+    assert schedule[author.lower()]["rate"] > 0
+
+
+def test_quiet_accounts_get_marks_so_groups_become_incremental(monkeypatch):
+    author = fetch_x.load_accounts()[0]["username"]
+    state = run_collect(monkeypatch, {}, pages=2, author=author)
+    groups = fetch_x.plan_account_queries(fetch_x.load_accounts(), fetch_x.ACCOUNT_KEYWORDS, state)
+    first = next(g for g in groups if author in g.usernames)
+    assert all(state[f"from:{u.lower()}"]["since_id"] == "1000" for u in first.usernames)
+    assert "since_id:1000" in first.query
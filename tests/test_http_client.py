@@ -0,0 +1,48 @@
+import time
+
+import pytest
+
+import deadline
+import http_client
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = b""
+
+
+def test_retry_wait_does_not_pass_stage_deadline(monkeypatch):
+    calls = []
+
+    def send(url, host, **kwargs):
+        calls.append(time.monotonic())
+        return FakeResponse(503, {"Retry-After": "30"})
+
+    monkeypatch.setattr(http_client, "send", send)
+    deadline.start_run(2)
+    start = time.monotonic()
+    resp = http_client.get("http://deadline.test/feed", retries=3, stage="fetch")
+    assert resp.status_code == 503
+    assert time.monotonic() - start < 2
+    assert len(calls) == 1
+
+
+def test_rate_limit_responses_do_not_trip_breaker(monkeypatch):
+    statuses = iter([429] * 6 + [200])
+    monkeypatch.setattr(http_client, "send", lambda url, host, **kw: FakeResponse(next(statuses), {"Retry-After": "0"}))
+    resp = http_client.get("http://ratelimit.test/search", retries=6)
+    assert resp.status_code == 200
+    assert http_client.get_breaker("ratelimit.test/search").opened_at is None
+
+
+def test_open_breaker_does_not_spend_budget(monkeypatch):
+    monkeypatch.setattr(http_client, "send", lambda url, host, **kw: FakeResponse(200))
+    http_client.set_request_budget("breaker.test", 1)
+    breaker = http_client.get_breaker("breaker.test/api")
+    breaker.opened_at = time.monotonic()
+    with pytest.raises(http_client.CircuitOpenError):
+        http_client.get("http://breaker.test/api")
+    breaker.record(True)
+    assert http_client.get("http://breaker.test/api").status_code == 200
@@ -0,0 +1,46 @@
+import sqlite3
+import sys
+
+import pytest
+
+import search_index
+from item_store import ItemStore
+
+TWEET = {"id": "1", "text": "SEC charged an exchange", "source": "x", "author": "sec_news",
+         "created_at": "Tue Oct 14 10:00:00 +0000 2026"}
+
+
+def unavailable(*args, **kwargs):
+    raise sqlite3.OperationalError("no such tokenizer: trigram")
+
+
+@pytest.mark.parametrize("breakage", ["sqlite", "import"])
+def test_store_works_without_search_index(tmp_path, monkeypatch, breakage):
+    if breakage == "sqlite":
+        monkeypatch.setattr(search_index, "SearchIndex", unavailable)
+    else:
+        monkeypatch.setitem(sys.modules, "search_index", None)
+    store = ItemStore(str(tmp_path / "items.db"))
+    try:
+        assert store.index is None
+        assert len(store.add_items([TWEET])) == 1
+        store.save_analysis([{**TWEET, "priority": "P1", "category": "执法行动"}])
+        assert store.unanalyzed() == []
+    finally:
+        store.close()
+
+
+def test_pruned_items_are_not_new_again(tmp_path):
+    store = ItemStore(str(tmp_path / "items.db"), index=False)
+    try:
+        assert len(store.add_items([TWEET])) == 1
+        store.conn.execute("UPDATE items SET fetched_at = '2000-01-01T00:00:00+00:00'")
+        assert store.prune() == 1
+        assert store.add_items([TWEET]) == []
+        assert store.fetched_by_day() == {}
+
+        store.conn.execute("UPDATE seen SET seen_at = '2000-01-01T00:00:00+00:00'")
+        store.prune()
+        assert len(store.add_items([TWEET])) == 1
+    finally:
+        store.close()
@@ -0,0 +1,69 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import http_client
+from llm_backends import BackendError, HttpBackend
+
+TEXT = '{"id": 1, "title": "香港监管新规", "priority": "P1"}'
+
+
+class SSEHandler(BaseHTTPRequestHandler):
+    """不带 charset 的 text/event-stream，逐字节分块发送，多字节字符会被拆开"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        body = b""
+        for piece in (TEXT[:20], TEXT[20:]):
+            event = {"choices": [{"delta": {"content": piece}}]}
+            body += f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8")
+        body += b"data: [DONE]\n\n"
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i in range(len(body)):
+            self.wfile.write(b"1\r\n" + body[i:i + 1] + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+
+def test_stream_without_charset_decodes_utf8():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SSEHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        backend = HttpBackend(f"http://127.0.0.1:{server.server_address[1]}/v1", "key", "model")
+        assert backend.complete("提示", timeout=10) == TEXT
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class UnauthorizedHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(401)
+        self.end_headers()
+
+
+def test_client_errors_do_not_reset_breaker():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), UnauthorizedHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        backend = HttpBackend(f"http://127.0.0.1:{server.server_address[1]}/v1", "key", "model", stream=False)
+        breaker = http_client.get_breaker(backend.url)
+        breaker.failures = 2
+        with pytest.raises(BackendError):
+            backend.complete("提示", timeout=10)
+        assert breaker.failures == 2
+        assert breaker.allow()
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,50 @@
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import monitor
+from alerts import StubSink
+from llm_backends import build_backends, set_backends
+
+NOW = datetime.now(timezone.utc).strftime("%a %b %d %H:%M:%S +0000 %Y")
+
+
+def tweet(tweet_id: str, text: str, query: str) -> dict:
+    return {"id": tweet_id, "text": text, "created_at": NOW, "author": "sec_news",
+            "url": f"https://x.com/sec_news/status/{tweet_id}", "source": "x", "query": query}
+
+
+@pytest.fixture
+def feeds(monkeypatch):
+    """替换抓取函数，不访问网络"""
+    def install(tweets):
+        monkeypatch.setattr(monitor, "collect_tweets", lambda: tweets)
+        monkeypatch.setattr(monitor, "collect_articles", lambda: [])
+    yield install
+    set_backends(None)
+
+
+def test_once_pushes_p1_with_stub_backend(feeds):
+    feeds([
+        tweet("101", "SEC charges exchange with operating an unregistered platform", "from:sec_news"),
+        tweet("102", "Weekly market recap and research notes", "from:sec_news"),
+    ])
+    set_backends(build_backends("stub"))
+    sink = StubSink()
+    asyncio.run(monitor.run([sink], skip_analyze=False, interval=60, once=True))
+    assert [a["url"] for a in sink.sent] == ["https://x.com/sec_news/status/101"]
+
+    # 第二轮同样的条目已入库，不重复推送
+    asyncio.run(monitor.run([sink], skip_analyze=False, interval=60, once=True))
+    assert len(sink.sent) == 1
+
+
+def test_skip_analyze_ignores_keyword_search_results(feeds):
+    feeds([
+        tweet("201", "SEC enforcement action against token issuer", "SEC enforcement"),
+        tweet("202", "SEC charges founder with fraud", "from:sec_news"),
+    ])
+    sink = StubSink()
+    asyncio.run(monitor.run([sink], skip_analyze=True, interval=60, once=True))
+    assert [a["url"] for a in sink.sent] == ["https://x.com/sec_news/status/202"]
@@ -0,0 +1,14 @@
+import pytest
+
+from ndjson_io import read_records, write_records
+
+
+@pytest.mark.parametrize("suffix", ["", ".gz", ".zst"])
+def test_appended_batches_are_all_read(tmp_path, suffix):
+    if suffix == ".zst":
+        pytest.importorskip("zstandard")
+    path = str(tmp_path / f"alerts.ndjson{suffix}")
+    write_records(path, [{"id": 1}, {"id": 2}], append=True)
+    write_records(path, [{"id": 3}], append=True)
+    write_records(path, [{"id": 4, "title": "监管"}], append=True)
+    assert [r["id"] for r in read_records(path)] == [1, 2, 3, 4]
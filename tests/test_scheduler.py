@@ -0,0 +1,25 @@
+from datetime import datetime, timedelta, timezone
+
+import scheduler
+
+
+def polled_minutes_ago(minutes: float, rate: float) -> dict:
+    last = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+    return {"sec_news": {"last_polled": last.isoformat(), "rate": rate}}
+
+
+def test_short_interval_rate_uses_actual_elapsed_time():
+    state = polled_minutes_ago(10, rate=144.0)
+    scheduler.update_stats(state, {"sec_news": [{"text": "t"}]})
+    # 10 分钟 1 条 ≈ 每天 144 条，不应被按 1 小时折算成每天 24 条
+    assert state["sec_news"]["rate"] > 140
+
+
+def test_partial_polls_do_not_lower_rate():
+    state = polled_minutes_ago(60, rate=50.0)
+    scheduler.update_stats(state, {"sec_news": []}, partial={"sec_news"})
+    assert state["sec_news"]["rate"] == 50.0
+    assert state["sec_news"]["polls"] == 1
+
+    scheduler.update_stats(state, {"sec_news": []})
+    assert state["sec_news"]["rate"] < 50.0
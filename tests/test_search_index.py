@@ -0,0 +1,27 @@
+import pytest
+
+from search_index import SearchIndex
+
+TWEET = {"text": "SEC charged an exchange over stablecoin sales", "source": "x"}
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / "search.db"))
+    yield index
+    index.close()
+
+
+def test_add_replaces_by_uid(index):
+    index.add([("x:1", "2026-10-14T10:00:00+00:00", TWEET)])
+    index.add([("x:1", "2026-10-14T10:00:00+00:00", {**TWEET, "priority": "P1"})])
+    results = index.search("stablecoin")
+    assert [(r["uid"], r["priority"]) for r in results] == [("x:1", "P1")]
+    assert index.conn.execute("SELECT COUNT(*) FROM doc_uids").fetchone() == (1,)
+
+
+def test_prune_removes_old_docs_and_mappings(index):
+    index.add([("x:1", "2000-01-01T00:00:00+00:00", TWEET), ("x:2", "2026-10-14T10:00:00+00:00", TWEET)])
+    assert index.prune() == 1
+    assert [r["uid"] for r in index.search("stablecoin")] == ["x:2"]
+    assert index.conn.execute("SELECT uid FROM doc_uids").fetchall() == [("x:2",)]